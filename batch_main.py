@@ -0,0 +1,157 @@
+import argparse
+import csv
+import json
+import os
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from doctolib_scraper import (
+    EXTRACTION_ENGINES,
+    NAVIGATION_METHODS,
+    BROWSER_PROFILES,
+    setup_driver,
+    slugify
+)
+from scraper_core import DEPTH_CARDS, scrape
+from driver_pool import DriverPool
+from output_sinks import OUTPUT_FORMATS, OUTPUT_EXTENSIONS, open_sink
+from dedup_index import DedupIndex
+from doctolib_selectors import selector_registry
+from cli import add_dedup_argument, add_politeness_arguments, configure_politeness, print_run_reports
+
+def load_queries(path):
+    """Lit les couples (spécialité, lieu) d'un fichier CSV ou JSONL"""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            specialite = (row.get("specialite") or "").strip()
+            lieu = (row.get("lieu") or "").strip()
+            if not specialite or not lieu:
+                print(f"⚠️ Ligne ignorée (spécialité ou lieu manquant): {row}")
+                continue
+            max_results = row.get("max_results")
+            queries.append({
+                "specialite": specialite,
+                "lieu": lieu,
+                "max_results": int(max_results) if max_results not in (None, "") else None
+            })
+    return queries
+
+def query_filename(query, output_dir, output_format="csv"):
+    """Nom du fichier de sortie d'une requête"""
+    name = f"{slugify(query['specialite'])}_{slugify(query['lieu'])}{OUTPUT_EXTENSIONS[output_format]}"
+    return os.path.join(output_dir, name)
+
+class QuerySink:
+    """Compte les médecins d'une requête avant de les transmettre au sink (éventuellement partagé)"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.rows = 0
+
+    def write(self, record):
+        self.sink.write(record)
+        self.rows += 1
+
+def run_query(pool, query, engine, default_max_results, sink, navigation="url", dedup=None):
+    """Exécute une recherche sur une session du pool; les médecins sont écrits dans sink
+
+    dedup (DedupIndex partagé entre les requêtes) écarte les médecins déjà trouvés
+    par une autre requête du lot ou par une exécution précédente.
+    """
+    max_results = query["max_results"] or default_max_results
+    # Le moteur commun repart de la page d'accueil si la session a servi à une autre recherche
+    scrape(query["specialite"], query["lieu"], DEPTH_CARDS, pool=pool, navigation=navigation, card_engine=engine,
+           max_results=max_results, sink=sink, dedup=dedup)
+
+def print_summary(summaries, total_elapsed):
+    """Affiche le débit par requête et le débit total"""
+    print("\n=== Résumé du lot ===")
+    total_doctors = 0
+    for query, count, elapsed, error in summaries:
+        total_doctors += count
+        rate = count / elapsed * 60 if elapsed else 0
+        status = f"❌ {error}" if error else f"{rate:.1f} médecins/min"
+        print(f"{query['specialite']} à {query['lieu']}: {count} médecins en {elapsed:.1f} s ({status})")
+    rate = total_doctors / total_elapsed * 60 if total_elapsed else 0
+    print(f"Total: {total_doctors} médecins, {len(summaries)} requêtes en {total_elapsed:.1f} s ({rate:.1f} médecins/min)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraper Doctolib en lot (plusieurs couples spécialité/lieu)")
+    parser.add_argument("--input", type=str, required=True,
+                        help="Fichier CSV (colonnes specialite,lieu[,max_results]) ou JSONL")
+    parser.add_argument("--workers", type=int, default=2, help="Nombre de sessions Chrome partagées")
+    parser.add_argument("--max_results", type=int, default=None, help="Nombre maximum de résultats par requête")
+    parser.add_argument("--output", type=str, default=None, help="Fichier unique regroupant toutes les requêtes")
+    parser.add_argument("--output_dir", type=str, default="resultats_lot",
+                        help="Dossier des fichiers par requête (si --output n'est pas fourni)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None,
+                        help="Format de sortie: csv, parquet ou sqlite (par défaut: d'après l'extension de --output, "
+                             "sinon csv)")
+    parser.add_argument("--engine", choices=EXTRACTION_ENGINES, default="js",
+                        help="Moteur d'extraction des cartes")
+    parser.add_argument("--navigation", choices=NAVIGATION_METHODS, default="url",
+                        help="url: ouverture directe de la page de résultats, form: formulaire de recherche")
+    parser.add_argument("--browser_profile", choices=BROWSER_PROFILES, default="full",
+                        help="full: Chrome complet, lean: headless sans images, polices ni traceurs")
+    parser.add_argument("--max_pages_per_session", type=int, default=200,
+                        help="Nombre de pages chargées (recherches, pages de résultats, profils) "
+                             "avant de recycler une session Chrome")
+    add_dedup_argument(parser)
+    add_politeness_arguments(parser)
+
+    args = parser.parse_args()
+    configure_politeness(args)
+
+    queries = load_queries(args.input)
+    if not queries:
+        print("❌ Aucune requête à exécuter.")
+        return
+    if not args.output:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    # Un seul fichier partagé par toutes les requêtes, ou un fichier par requête
+    combined = open_sink(args.output, output_format=args.format) if args.output else None
+    summaries = [None] * len(queries)
+    # Un médecin trouvé par plusieurs requêtes (ex: Lyon et 69003) n'est écrit qu'une fois
+    dedup = DedupIndex(args.dedup_index)
+    selector_registry.load()
+
+    def process(index):
+        query = queries[index]
+        start = time.perf_counter()
+        writer = combined or open_sink(query_filename(query, args.output_dir, args.format or "csv"))
+        sink = QuerySink(writer)
+        error = None
+        try:
+            run_query(pool, query, args.engine, args.max_results, sink, args.navigation, dedup)
+        except Exception as e:
+            error = e
+        finally:
+            if writer is not combined:
+                writer.finalize()
+        elapsed = time.perf_counter() - start
+        summaries[index] = (query, sink.rows, elapsed, error)
+
+    start_time = time.perf_counter()
+    pool = DriverPool(size=args.workers, max_pages=args.max_pages_per_session,
+                      driver_factory=partial(setup_driver, profile=args.browser_profile))
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(process, range(len(queries))))
+    finally:
+        pool.close()
+        dedup.close()
+        selector_registry.save()
+
+    if combined:
+        combined.finalize()
+    print_summary(summaries, time.perf_counter() - start_time)
+    print_run_reports(args.browser_profile, dedup=dedup)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Banc d'essai hors ligne des moteurs d'extraction, sur les pages enregistrées (fixtures/).
+
+Les pages de résultats (fixtures/search) et de profil (fixtures/profiles) sont
+servies par fixture_server; les scénarios appellent le vrai code du scraper:
+
+    cartes/webdriver, cartes/js, cartes/html   scrape_doctors sur toutes les pages de résultats (&page=N)
+    profils/webdriver, profils/html            scrape_profile sur chaque page de profil
+    profils/http                               fetch_profiles, sans navigateur
+    memoire/dicts, memoire/records             --records cartes gardées en mémoire, en dictionnaires
+                                               de build_doctor_info ou en DoctorRecord (sans navigateur)
+
+Pour chaque scénario: débit (médecins/min), latence moyenne par médecin, pic de
+mémoire Python (tracemalloc) et mémoire de Chrome (si psutil est installé).
+
+    python benchmark.py --browser_profile lean --output bench.json
+    python benchmark.py --scenarios memoire/dicts,memoire/records --records 1000000
+    python benchmark.py --baseline bench.json   # signale les régressions de débit
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from doctolib_scraper import (
+    BROWSER_PROFILES,
+    EXTRACTION_ENGINES,
+    RESULT_CARDS_CSS,
+    setup_driver,
+    scrape_doctors,
+    build_doctor_info
+)
+from scraper_core import DoctorRecord
+from scraping_a_doctor import scrape_profile
+from http_engine import fetch_profiles
+from fixture_server import serve_fixtures, list_fixture_urls
+from browser_metrics import browser_rss_mb
+from waits import wait_for_presence, wait_for_page_ready
+from rate_limiter import rate_limiter
+
+BROWSER_PROFILE_ENGINES = ("webdriver", "html")
+MEMORY_SCENARIOS = ("memoire/dicts", "memoire/records")
+SCENARIOS = ([f"cartes/{engine}" for engine in EXTRACTION_ENGINES]
+             + [f"profils/{engine}" for engine in BROWSER_PROFILE_ENGINES] + ["profils/http"]
+             + list(MEMORY_SCENARIOS))
+
+# Valeurs des cartes synthétiques: peu de spécialités, villes et secteurs distincts, comme dans un lot réel
+SYNTHETIC_SPECIALTIES = ("Pédiatre", "Médecin généraliste", "Dermatologue", "Ophtalmologue", "Gynécologue")
+SYNTHETIC_CITIES = (("69001", "Lyon"), ("69100", "Villeurbanne"), ("75008", "Paris"), ("13001", "Marseille"),
+                    ("33000", "Bordeaux"), ("31000", "Toulouse"), ("59000", "Lille"))
+SYNTHETIC_SECTORS = ("Conventionné secteur 1", "Conventionné secteur 2 avec OPTAM", "Non conventionné",
+                     "Non spécifié")
+
+def _measure(name, run):
+    """Exécute run() (qui retourne le nombre de médecins extraits) et mesure temps et mémoire"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "scenario": name,
+        "records": records,
+        "seconds": round(elapsed, 3),
+        "records_per_min": round(records / elapsed * 60, 1) if elapsed else None,
+        "ms_per_record": round(elapsed / records * 1000, 2) if records else None,
+        "python_peak_mb": round(peak / 1024 / 1024, 2),
+    }
+
+def bench_cards(driver, url, engine, max_results=None):
+    """scrape_doctors sur la page de résultats enregistrée, toutes pages comprises"""
+    def run():
+        driver.get(url)
+        wait_for_page_ready(driver)
+        wait_for_presence(driver, (By.CSS_SELECTOR, RESULT_CARDS_CSS), "resultats")
+        return len(scrape_doctors(driver, WebDriverWait(driver, 10), max_results, engine=engine))
+    return run
+
+def bench_browser_profiles(driver, urls, engine):
+    """Boucle de scrape_doctolib: une visite de page par profil"""
+    def run():
+        done = 0
+        for i, url in enumerate(urls):
+            try:
+                scrape_profile(driver, url, engine, index=i)
+                done += 1
+            except Exception as e:
+                print(f"⚠️ {url}: {e}")
+        return done
+    return run
+
+def bench_http_profiles(urls, concurrency):
+    def run():
+        return sum(result is not None for result in fetch_profiles(urls, concurrency=concurrency))
+    return run
+
+def _fresh(text):
+    """Copie distincte d'un texte, comme chaque texte relu dans le navigateur"""
+    return text.encode("utf-8").decode("utf-8")
+
+def synthetic_raw_cards(count):
+    """count cartes brutes, telles que les renvoie extract_card_texts (une chaîne distincte par valeur)"""
+    for i in range(count):
+        postal_code, city = SYNTHETIC_CITIES[i % 7]
+        raw = {
+            "name": _fresh(f"Dr Praticien {i}"),
+            "specialty": _fresh(SYNTHETIC_SPECIALTIES[i % 5]),
+            "address": _fresh(f"{i % 200} rue de la Paix\n{postal_code} {city}"),
+            "url": _fresh(f"https://www.doctolib.fr/pediatre/{city.lower()}/praticien-{i}"),
+            "price_texts": [],
+        }
+        if i % 4:
+            raw["availability"] = _fresh(f"Demain {8 + i % 10}:30")
+        if SYNTHETIC_SECTORS[i % 4] != "Non spécifié":
+            raw["price_texts"].append(_fresh(SYNTHETIC_SECTORS[i % 4]))
+        if i % 3:
+            raw["price_texts"].append(_fresh(f"Consultation : {25 + i % 50} €"))
+        yield raw
+
+def bench_records(count, compact):
+    """Garde count cartes en mémoire: dictionnaires de build_doctor_info, ou DoctorRecord compacts"""
+    def run():
+        infos = (build_doctor_info(raw) for raw in synthetic_raw_cards(count))
+        kept = [DoctorRecord.from_card(info) for info in infos] if compact else list(infos)
+        return len(kept)
+    return run
+
+def run_benchmarks(scenarios, repeat=5, latency=0.0, browser_profile="lean", concurrency=8, max_results=None,
+                   polite=False, records=1000000):
+    """Exécute les scénarios demandés et retourne leurs mesures (sans limiteur de débit sauf si polite)"""
+    rate_limiter.configure(enabled=polite)
+    results = []
+    driver = None
+    with serve_fixtures(latency=latency) as base_url:
+        search_url = list_fixture_urls(base_url, "search")[0]
+        profile_urls = list_fixture_urls(base_url, "profiles") * repeat
+
+        if any(scenario not in MEMORY_SCENARIOS and not scenario.endswith("/http") for scenario in scenarios):
+            try:
+                driver = setup_driver(browser_profile)
+            except Exception as e:
+                print(f"⚠️ Navigateur indisponible, scénarios navigateur ignorés: {e}")
+        try:
+            for scenario in scenarios:
+                kind, engine = scenario.split("/")
+                if kind == "memoire":
+                    run = bench_records(records, compact=engine == "records")
+                elif kind == "profils" and engine == "http":
+                    run = bench_http_profiles(profile_urls, concurrency)
+                elif driver is None:
+                    continue
+                elif kind == "cartes":
+                    run = bench_cards(driver, search_url, engine, max_results)
+                else:
+                    run = bench_browser_profiles(driver, profile_urls, engine)
+                print(f"\n--- {scenario} ---")
+                result = _measure(scenario, run)
+                browser = driver and kind != "memoire" and engine != "http"
+                result["browser_rss_mb"] = browser_rss_mb(driver) if browser else None
+                results.append(result)
+        finally:
+            if driver is not None:
+                driver.quit()
+    return results
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Liste les scénarios dont le débit a baissé de plus de tolerance (fraction) par rapport à la référence"""
+    previous = {result["scenario"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if not before or not before.get("records_per_min") or not result["records_per_min"]:
+            continue
+        change = result["records_per_min"] / before["records_per_min"] - 1
+        if change < -tolerance:
+            regressions.append((result["scenario"], before["records_per_min"], result["records_per_min"], change))
+    return regressions
+
+def print_results(results):
+    print("\n=== Banc d'essai ===")
+    print(f"{'scénario':<20}{'médecins':>9}{'durée (s)':>11}{'méd./min':>10}{'ms/méd.':>10}"
+          f"{'Python (Mo)':>13}{'Chrome (Mo)':>13}")
+    for r in results:
+        rss = f"{r['browser_rss_mb']:.0f}" if r.get("browser_rss_mb") else "-"
+        per_record = f"{r['ms_per_record']:.1f}" if r["ms_per_record"] is not None else "-"
+        rate = f"{r['records_per_min']:.0f}" if r["records_per_min"] is not None else "-"
+        print(f"{r['scenario']:<20}{r['records']:>9}{r['seconds']:>11.2f}{rate:>10}{per_record:>10}"
+              f"{r['python_peak_mb']:>13.1f}{rss:>13}")
+
+def print_memory_comparison(results):
+    """Mémoire par médecin des dictionnaires et des DoctorRecord, si les deux scénarios ont tourné"""
+    memory = {result["scenario"]: result for result in results if result["scenario"] in MEMORY_SCENARIOS}
+    if len(memory) < len(MEMORY_SCENARIOS) or not all(result["records"] for result in memory.values()):
+        return
+    dicts, records = memory["memoire/dicts"], memory["memoire/records"]
+    per_dict = dicts["python_peak_mb"] * 1024 * 1024 / dicts["records"]
+    per_record = records["python_peak_mb"] * 1024 * 1024 / records["records"]
+    print(f"\nMémoire par médecin: {per_dict:.0f} o en dictionnaire, {per_record:.0f} o en DoctorRecord "
+          f"({per_record / per_dict - 1:+.0%}, {records['records']} médecins)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai hors ligne des moteurs d'extraction")
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS),
+                        help=f"Scénarios séparés par des virgules, parmi: {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de passages sur les pages de profil")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence simulée par requête (s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requêtes simultanées (profils/http)")
+    parser.add_argument("--max_results", type=int, default=None, help="Nombre maximum de cartes par scénario")
+    parser.add_argument("--records", type=int, default=1000000,
+                        help="Nombre de cartes gardées en mémoire (scénarios memoire/*)")
+    parser.add_argument("--browser_profile", choices=BROWSER_PROFILES, default="lean")
+    parser.add_argument("--polite", action="store_true",
+                        help="Garder le limiteur de débit (désactivé par défaut sur les pages locales)")
+    parser.add_argument("--output", type=str, default=None, help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", type=str, default=None, help="Résultats JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Baisse de débit tolérée par rapport à la référence (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = [scenario for scenario in scenarios if scenario not in SCENARIOS]
+    if unknown:
+        parser.error(f"Scénarios inconnus: {', '.join(unknown)}")
+
+    results = run_benchmarks(scenarios, args.repeat, args.latency, args.browser_profile,
+                             args.concurrency, args.max_results, args.polite, args.records)
+    print_results(results)
+    print_memory_comparison(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "parameters": vars(args), "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"✓ Résultats écrits dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for scenario, before, after, change in regressions:
+            print(f"❌ Régression {scenario}: {before:.0f} -> {after:.0f} médecins/min ({change:+.0%})")
+        if regressions:
+            raise SystemExit(1)
+        print("✓ Aucune régression de débit par rapport à la référence")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Mesures côté navigateur: temps de chargement des pages et mémoire de Chrome."""
+import threading
+import weakref
+
+try:
+    import psutil
+except ImportError:  # la mesure mémoire est désactivée sans psutil
+    psutil = None
+
+# Mesure de la mémoire de Chrome disponible (psutil installé)
+RSS_AVAILABLE = psutil is not None
+
+# Une entrée par page mesurée: (étiquette, durée_ms, rss_mo)
+page_loads = []
+_lock = threading.Lock()
+
+# Pages chargées par chaque driver (navigations, pages de résultats et profils)
+_pages_loaded = weakref.WeakKeyDictionary()
+
+_NAVIGATION_TIMING_JS = """
+var entry = performance.getEntriesByType('navigation')[0];
+if (entry) { return entry.loadEventEnd > 0 ? entry.loadEventEnd : entry.domContentLoadedEventEnd; }
+var t = performance.timing;
+return (t.loadEventEnd || t.domContentLoadedEventEnd) - t.navigationStart;
+"""
+
+def browser_rss_mb(driver):
+    """Mémoire résidente (Mo) de chromedriver et des processus Chrome qu'il a lancés"""
+    if psutil is None:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        processes = [process] + process.children(recursive=True)
+    except Exception:
+        return None
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+def count_page_load(driver):
+    """Compte une page chargée par driver"""
+    with _lock:
+        _pages_loaded[driver] = _pages_loaded.get(driver, 0) + 1
+
+def pages_loaded(driver):
+    """Nombre de pages chargées par driver depuis sa création"""
+    with _lock:
+        return _pages_loaded.get(driver, 0)
+
+def record_page_load(driver, label):
+    """Enregistre la durée de chargement de la page courante et la mémoire du navigateur"""
+    try:
+        duration_ms = float(driver.execute_script(_NAVIGATION_TIMING_JS) or 0)
+    except Exception:
+        duration_ms = None
+    rss = browser_rss_mb(driver)
+    with _lock:
+        page_loads.append((label, duration_ms, rss))
+    return duration_ms, rss
+
+def print_page_load_report(profile=None):
+    """Affiche le temps de chargement moyen par type de page et la mémoire maximale"""
+    if not page_loads:
+        return
+    title = f" (profil {profile})" if profile else ""
+    print(f"\n=== Chargement des pages{title} ===")
+    by_label = {}
+    for label, duration_ms, rss in page_loads:
+        by_label.setdefault(label, []).append((duration_ms, rss))
+    for label, entries in sorted(by_label.items()):
+        durations = [d for d, _ in entries if d is not None]
+        memories = [m for _, m in entries if m is not None]
+        average = f"{sum(durations) / len(durations):.0f} ms" if durations else "n/d"
+        peak = f"{max(memories):.0f} Mo" if memories else "n/d (psutil absent)"
+        print(f"{label:<12} {len(entries):4d} pages, chargement moyen {average}, RSS max {peak}")
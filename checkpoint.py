@@ -0,0 +1,114 @@
+"""Points de reprise des extractions (fichier SQLite).
+
+Enregistre les cartes et les profils déjà traités (avec leurs données) ainsi que
+l'état de la recherche, pour qu'une exécution interrompue reprenne là où elle
+s'est arrêtée avec --resume. Le fichier est toujours écrit et n'est supprimé
+qu'une fois l'exécution terminée (complete() puis close()): un arrêt imprévu
+laisse toujours de quoi reprendre.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+# Types de travaux enregistrés
+CARD = "carte"
+PROFILE = "profil"
+
+def card_key(info):
+    """Identité d'une carte: nom, rue et code postal normalisés"""
+    return "|".join(
+        " ".join(str(info.get(field, "")).lower().split())
+        for field in ("Nom complet", "Rue", "Code postal")
+    )
+
+def default_checkpoint_path(output):
+    """Fichier de reprise associé à un fichier de sortie"""
+    return f"{os.path.splitext(output)[0]}.checkpoint.sqlite"
+
+class CheckpointStore:
+    """Travaux terminés et état d'une exécution, écrits immédiatement sur disque"""
+
+    def __init__(self, path, resume=True):
+        self.path = path
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self.completed = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS done ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, payload TEXT, "
+            "PRIMARY KEY (kind, key))")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        # Index en mémoire des clés terminées: recherche en O(1)
+        self._done = {}
+        for kind, key in self._conn.execute("SELECT kind, key FROM done"):
+            self._done.setdefault(kind, set()).add(key)
+        if resume and self.count():
+            print(f"✓ Reprise: {self.count(CARD)} cartes et {self.count(PROFILE)} profils déjà traités")
+
+    def is_done(self, kind, key):
+        return key in self._done.get(kind, ())
+
+    def mark_done(self, kind, key, payload=None):
+        """Marque un travail comme terminé (et conserve ses données)"""
+        data = json.dumps(payload, ensure_ascii=False) if payload is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO done (kind, key, payload) VALUES (?, ?, ?)", (kind, key, data))
+            self._conn.commit()
+            self._done.setdefault(kind, set()).add(key)
+
+    def payload(self, kind, key):
+        """Données enregistrées pour un travail terminé"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM done WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def payloads(self, kind):
+        """Données de tous les travaux terminés d'un type, dans l'ordre d'enregistrement"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM done WHERE kind = ? ORDER BY rowid", (kind,)).fetchall()
+        return [json.loads(row[0]) for row in rows if row[0]]
+
+    def count(self, kind=None):
+        if kind is None:
+            return sum(len(keys) for keys in self._done.values())
+        return len(self._done.get(kind, ()))
+
+    def get_state(self, name, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, name, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (name, value) VALUES (?, ?)",
+                (name, json.dumps(value, ensure_ascii=False)))
+            self._conn.commit()
+
+    def complete(self):
+        """Marque l'exécution comme terminée: le fichier de reprise sera supprimé par close()"""
+        self.completed = True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        if self.completed:
+            for path in (self.path, f"{self.path}-wal", f"{self.path}-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,46 @@
+"""Options et rapports communs aux points d'entrée (main, one_doctor_main, batch_main, refresh).
+
+    parser = argparse.ArgumentParser(...)
+    add_politeness_arguments(parser)
+    add_dedup_argument(parser)
+    args = parser.parse_args()
+    configure_politeness(args)
+    ...
+    print_run_reports(args.browser_profile, dedup=dedup, cache=cache)
+"""
+from browser_metrics import print_page_load_report
+from doctolib_selectors import selector_registry
+from instrumentation import print_stage_report
+from rate_limiter import rate_limiter
+from waits import configure_timeouts, parse_timeouts, print_wait_report
+
+def add_politeness_arguments(parser, timeouts_example="resultats=20,suggestions=3"):
+    """Débit par hôte (--rate, --max_rate, --host_concurrency) et délais d'attente (--timeouts)"""
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Débit initial par hôte (requêtes/s), ajusté ensuite selon les réponses")
+    parser.add_argument("--max_rate", type=float, default=None, help="Débit maximum par hôte (requêtes/s)")
+    parser.add_argument("--host_concurrency", type=int, default=None,
+                        help="Requêtes simultanées au plus vers un même hôte")
+    parser.add_argument("--timeouts", type=str, default="",
+                        help=f"Délais d'attente par étape, ex: {timeouts_example}")
+
+def add_dedup_argument(parser):
+    parser.add_argument("--dedup_index", type=str, default=None,
+                        help="Fichier SQLite des médecins déjà extraits, ignorés lors des exécutions suivantes")
+
+def configure_politeness(args):
+    """Applique les options de add_politeness_arguments au limiteur de débit et aux attentes"""
+    configure_timeouts(**parse_timeouts(args.timeouts))
+    rate_limiter.configure(rate=args.rate, max_rate=args.max_rate, max_concurrency=args.host_concurrency)
+
+def print_run_reports(browser_profile=None, dedup=None, cache=None):
+    """Rapports de fin d'exécution: déduplication, cache, attentes, débit, pages, étapes et sélecteurs"""
+    if dedup is not None:
+        dedup.report()
+    if cache is not None:
+        cache.report()
+    print_wait_report()
+    rate_limiter.report()
+    print_page_load_report(browser_profile)
+    print_stage_report()
+    selector_registry.report()
@@ -0,0 +1,124 @@
+"""Index de déduplication des médecins, partagé entre pages, requêtes et exécutions.
+
+Un même praticien apparaît dans des recherches qui se recouvrent ("pédiatre" à
+"Lyon" et à "69003") ou plusieurs fois dans les pages de résultats. Chaque
+médecin est identifié par l'URL de son profil ou, à défaut, par son nom et son
+adresse normalisés. Les clés connues sont gardées dans un ensemble en mémoire
+(recherche en O(1)) et, si un chemin est fourni, dans un fichier SQLite pour que
+les exécutions suivantes ignorent les médecins déjà extraits.
+"""
+import re
+import sqlite3
+import threading
+import unicodedata
+from urllib.parse import urlsplit
+
+# Champs d'adresse des cartes (doctolib_scraper) et des profils (scraping_a_doctor)
+CARD_ADDRESS_FIELDS = ("Rue", "Code postal")
+PROFILE_ADDRESS_FIELDS = ("address",)
+MISSING_VALUES = ("", "Non spécifié", "Unknown")
+
+def normalize_text(text):
+    """Minuscules sans accents ni ponctuation, espaces réduits"""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+def normalize_url(url):
+    """URL de profil sans paramètres, fragment ni barre finale"""
+    parts = urlsplit(url.strip())
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+def doctor_key(info, url=None):
+    """Clé d'un médecin: URL du profil, sinon nom et adresse normalisés (None si aucun nom)"""
+    url = url or info.get("url")
+    if url and url not in MISSING_VALUES:
+        return f"url:{normalize_url(url)}"
+    name = info.get("Nom complet", info.get("name"))
+    if not name or name in MISSING_VALUES:
+        return None
+    fields = CARD_ADDRESS_FIELDS if "Nom complet" in info else PROFILE_ADDRESS_FIELDS
+    address = " ".join(str(info.get(field, "")) for field in fields
+                       if info.get(field) not in MISSING_VALUES + (None,))
+    return f"nom:{normalize_text(name)}|{normalize_text(address)}"
+
+class DedupIndex:
+    """Ensemble des médecins déjà vus, persistant si path est fourni"""
+
+    def __init__(self, path=None, commit_every=500):
+        self.path = path
+        self.commit_every = commit_every
+        self.added = 0
+        self.duplicates = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._keys = set()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS doctors (key TEXT PRIMARY KEY)")
+            self._conn.commit()
+            self._keys.update(key for (key,) in self._conn.execute("SELECT key FROM doctors"))
+            if self._keys:
+                print(f"✓ Déduplication: {len(self._keys)} médecins déjà connus ({path})")
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def seen(self, info, url=None):
+        """Vrai si le médecin est déjà dans l'index"""
+        key = doctor_key(info, url)
+        return key is not None and key in self._keys
+
+    def add(self, info, url=None):
+        """Ajoute un médecin; retourne False s'il était déjà connu (doublon)"""
+        key = doctor_key(info, url)
+        if key is None:
+            return True  # sans nom ni URL, impossible de reconnaître un doublon
+        with self._lock:
+            if key in self._keys:
+                self.duplicates += 1
+                return False
+            self._keys.add(key)
+            self.added += 1
+            if self._conn is not None:
+                self._conn.execute("INSERT OR IGNORE INTO doctors (key) VALUES (?)", (key,))
+                self._pending += 1
+                if self._pending >= self.commit_every:
+                    self._conn.commit()
+                    self._pending = 0
+        return True
+
+    def unique(self, records):
+        """Garde les médecins encore inconnus, dans l'ordre, et les ajoute à l'index"""
+        return [info for info in records if self.add(info)]
+
+    def flush(self):
+        with self._lock:
+            if self._conn is not None and self._pending:
+                self._conn.commit()
+                self._pending = 0
+
+    def report(self):
+        """Affiche le nombre de doublons écartés pendant l'exécution"""
+        if self.added or self.duplicates:
+            print("\n=== Déduplication ===")
+            print(f"{self.added} nouveaux médecins, {self.duplicates} doublons écartés, "
+                  f"{len(self._keys)} médecins dans l'index")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
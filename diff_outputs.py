@@ -0,0 +1,225 @@
+"""Différences entre deux exécutions: médecins ajoutés, supprimés et modifiés.
+
+Les deux fichiers de résultats (CSV, SQLite ou Parquet) sont lus en flux, triés
+sur la clé du médecin par tri externe (blocs de chunk_size lignes triés
+en mémoire puis écrits dans des fichiers temporaires, fusionnés avec
+heapq.merge), puis parcourus ensemble en une seule passe (jointure par fusion).
+La mémoire reste bornée par chunk_size, quel que soit le nombre de lignes.
+
+Un médecin est reconnu par l'URL de son profil ou, pour les fichiers de cartes,
+par son nom normalisé: un changement d'adresse apparaît donc comme une
+modification et non comme un départ suivi d'une arrivée. Les homonymes sont
+d'abord appariés par nom et adresse, puis dans l'ordre.
+
+    python diff_outputs.py hier.csv aujourdhui.csv --output diff.csv
+    python diff_outputs.py hier.csv aujourdhui.csv --ignore "Prochaine disponibilité"
+"""
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+from dedup_index import MISSING_VALUES, doctor_key, normalize_text, normalize_url
+from output_sinks import StreamingCsvWriter, output_format_for, pq
+
+ADDED = "ajouté"
+REMOVED = "supprimé"
+CHANGED = "modifié"
+
+# Colonnes du fichier de différences: une ligne par médecin ajouté ou supprimé,
+# une ligne par champ modifié
+DIFF_FIELDNAMES = ["Changement", "Clé", "Nom complet", "Champ", "Ancienne valeur", "Nouvelle valeur"]
+
+def iter_records(path, table="medecins", batch_size=10000):
+    """Parcourt les enregistrements d'un fichier de résultats sans le charger en entier"""
+    output_format = output_format_for(path)
+    if output_format == "sqlite":
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            for row in conn.execute(f'SELECT * FROM "{table}"'):
+                yield dict(row)
+        finally:
+            conn.close()
+        return
+    if output_format == "parquet":
+        if pq is None:
+            raise RuntimeError("La lecture Parquet nécessite pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+def match_key(record):
+    """Clé d'appariement: URL du profil, sinon nom normalisé (None si aucun des deux)"""
+    url = record.get("url")
+    if url and url not in MISSING_VALUES:
+        return f"url:{normalize_url(url)}"
+    name = record.get("Nom complet", record.get("name"))
+    if not name or name in MISSING_VALUES:
+        return None
+    return f"nom:{normalize_text(name)}"
+
+def _value(value):
+    return "" if value is None else str(value).strip()
+
+def _sort_key(item):
+    return item[0]
+
+class SortedRuns:
+    """Tri externe des enregistrements d'un fichier sur la clé d'appariement
+
+    Les blocs temporaires ne contiennent que la clé et les valeurs, dans l'ordre
+    de fieldnames: les noms de colonnes ne sont pas répétés à chaque ligne.
+    """
+
+    def __init__(self, records, directory, chunk_size=100000):
+        self.rows = 0
+        self.skipped = 0
+        self.fieldnames = []
+        self._paths = []
+        chunk = []
+        for record in records:
+            if not self.fieldnames:
+                self.fieldnames = list(record)
+            key = match_key(record)
+            if key is None:
+                self.skipped += 1
+                continue
+            chunk.append((key, [_value(record.get(field)) for field in self.fieldnames]))
+            self.rows += 1
+            if len(chunk) >= chunk_size:
+                self._spill(chunk, directory)
+                chunk = []
+        if chunk:
+            self._spill(chunk, directory)
+
+    def _spill(self, chunk, directory):
+        chunk.sort(key=_sort_key)
+        fd, path = tempfile.mkstemp(suffix=".jsonl", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for item in chunk:
+                f.write(json.dumps(item, ensure_ascii=False))
+                f.write("\n")
+        self._paths.append(path)
+
+    def _read(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def groups(self):
+        """(clé d'appariement, [enregistrement, ...]) dans l'ordre des clés"""
+        fieldnames = self.fieldnames
+        merged = heapq.merge(*(self._read(path) for path in self._paths), key=_sort_key)
+        for key, items in itertools.groupby(merged, key=_sort_key):
+            yield key, [dict(zip(fieldnames, values)) for _, values in items]
+
+def _pair(old_records, new_records):
+    """Apparie les enregistrements d'une même clé; les homonymes par nom et adresse d'abord, puis dans l'ordre"""
+    if len(old_records) == 1 and len(new_records) == 1:
+        return [(old_records[0], new_records[0])], [], []
+    pairs = []
+    remaining = [(doctor_key(record), record) for record in new_records]
+    unmatched = []
+    for record in old_records:
+        secondary = doctor_key(record)
+        index = next((i for i, (other, _) in enumerate(remaining) if other == secondary), None)
+        if index is None:
+            unmatched.append(record)
+        else:
+            pairs.append((record, remaining.pop(index)[1]))
+    leftovers = [record for _, record in remaining]
+    pairs.extend(zip(unmatched, leftovers))
+    return pairs, unmatched[len(leftovers):], leftovers[len(unmatched):]
+
+def diff_records(old_groups, new_groups, fields):
+    """Jointure par fusion de deux flux triés; génère (changement, clé, ancien, nouveau, [(champ, avant, après)])"""
+    old_groups, new_groups = iter(old_groups), iter(new_groups)
+    old = next(old_groups, None)
+    new = next(new_groups, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            for record in old[1]:
+                yield REMOVED, old[0], record, None, []
+            old = next(old_groups, None)
+        elif old is None or new[0] < old[0]:
+            for record in new[1]:
+                yield ADDED, new[0], None, record, []
+            new = next(new_groups, None)
+        else:
+            pairs, removed, added = _pair(old[1], new[1])
+            for before, after in pairs:
+                changes = [(field, before.get(field, ""), after.get(field, ""))
+                           for field in fields if before.get(field, "") != after.get(field, "")]
+                if changes:
+                    yield CHANGED, old[0], before, after, changes
+            for record in removed:
+                yield REMOVED, old[0], record, None, []
+            for record in added:
+                yield ADDED, new[0], None, record, []
+            old = next(old_groups, None)
+            new = next(new_groups, None)
+
+def _name(record):
+    return record.get("Nom complet", record.get("name", ""))
+
+def diff_outputs(old_path, new_path, output, ignore=(), chunk_size=100000, tmp_dir=None):
+    """Écrit les différences entre deux fichiers de résultats et retourne leur résumé"""
+    with tempfile.TemporaryDirectory(dir=tmp_dir, prefix="diff_doctolib_") as directory:
+        old_runs = SortedRuns(iter_records(old_path), directory, chunk_size)
+        new_runs = SortedRuns(iter_records(new_path), directory, chunk_size)
+        fields = [field for field in old_runs.fieldnames
+                  if field in new_runs.fieldnames and field not in ignore]
+        only_old = [field for field in old_runs.fieldnames if field not in new_runs.fieldnames]
+        only_new = [field for field in new_runs.fieldnames if field not in old_runs.fieldnames]
+        if only_old or only_new:
+            print(f"⚠️ Colonnes différentes, ignorées: {', '.join(only_old + only_new)}")
+
+        summary = {ADDED: 0, REMOVED: 0, CHANGED: 0, "fields": {}}
+        with StreamingCsvWriter(output, DIFF_FIELDNAMES) as writer:
+            for change, key, before, after, changes in diff_records(old_runs.groups(), new_runs.groups(), fields):
+                summary[change] += 1
+                if change != CHANGED:
+                    writer.write({"Changement": change, "Clé": key, "Nom complet": _name(before or after)})
+                    continue
+                for field, old_value, new_value in changes:
+                    summary["fields"][field] = summary["fields"].get(field, 0) + 1
+                    writer.write({"Changement": change, "Clé": key, "Nom complet": _name(after), "Champ": field,
+                                  "Ancienne valeur": old_value, "Nouvelle valeur": new_value})
+        summary["old_rows"], summary["new_rows"] = old_runs.rows, new_runs.rows
+        summary["skipped"] = old_runs.skipped + new_runs.skipped
+    return summary
+
+def print_summary(summary, output):
+    print("\n=== Différences ===")
+    print(f"{summary['old_rows']} -> {summary['new_rows']} médecins: {summary[ADDED]} ajoutés, "
+          f"{summary[REMOVED]} supprimés, {summary[CHANGED]} modifiés")
+    for field, count in sorted(summary["fields"].items(), key=lambda item: -item[1]):
+        print(f"  {field:<28} {count} modifications")
+    if summary["skipped"]:
+        print(f"⚠️ {summary['skipped']} lignes sans nom ni URL ignorées")
+    print(f"✓ Différences écrites dans {output}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare deux fichiers de résultats Doctolib")
+    parser.add_argument("old", help="Fichier de résultats précédent (CSV, SQLite ou Parquet)")
+    parser.add_argument("new", help="Fichier de résultats récent")
+    parser.add_argument("--output", type=str, default="differences.csv", help="Fichier CSV des différences")
+    parser.add_argument("--ignore", type=str, default="",
+                        help="Colonnes à ne pas comparer, séparées par des virgules (ex: Prochaine disponibilité)")
+    parser.add_argument("--chunk_size", type=int, default=100000,
+                        help="Lignes triées en mémoire avant d'être écrites sur disque")
+    parser.add_argument("--tmp_dir", type=str, default=None, help="Dossier des fichiers de tri temporaires")
+    args = parser.parse_args()
+
+    ignore = {field.strip() for field in args.ignore.split(",") if field.strip()}
+    summary = diff_outputs(args.old, args.new, args.output, ignore, args.chunk_size, args.tmp_dir)
+    print_summary(summary, args.output)
+
+if __name__ == "__main__":
+    main()
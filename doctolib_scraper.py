@@ -1,6 +1,8 @@
 import time
-import random
 import os
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from tqdm import tqdm
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -10,36 +12,169 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 import csv
+from waits import (
+    wait_for_presence,
+    wait_for_clickable,
+    wait_for_visible,
+    wait_for_page_ready,
+    wait_for_dom_quiescence,
+    record_first_result
+)
+from doctolib_selectors import (
+    CARD_SELECTORS,
+    CARD_FIELD_SELECTORS,
+    CARD_LINK_SELECTORS,
+    PRICE_SELECTORS,
+    selector_registry
+)
+from browser_metrics import record_page_load
+from checkpoint import CARD, card_key
+from dedup_index import DedupIndex
+from normalize import parse_address
+from instrumentation import stage, instrumented, instrument_driver
+from rate_limiter import polite_get
 
-def setup_driver():
-    """Configure et retourne le driver Selenium"""
-    service = Service(ChromeDriverManager().install())
+# Sélecteur combinant les différentes formes de cartes de résultats
+RESULT_CARDS_CSS = ", ".join(CARD_SELECTORS)
+
+# Colonnes des fichiers CSV de résultats
+CSV_FIELDNAMES = [
+    "Nom complet", "Spécialité", "Prochaine disponibilité",
+    "Secteur d'assurance", "Prix estimé", "Rue", "Code postal", "Ville"
+]
+
+# Moteurs d'extraction des cartes
+EXTRACTION_ENGINES = ("webdriver", "js", "html")
+
+HOME_URL = "https://www.doctolib.fr/"
+SEARCH_URL = "https://www.doctolib.fr/search"
+
+# Modes de navigation vers la page de résultats
+NAVIGATION_METHODS = ("url", "form")
+
+# Profils de navigateur: "full" charge tout, "lean" est headless et bloque images, polices et traceurs
+BROWSER_PROFILES = ("full", "lean")
+LEAN_WINDOW_SIZE = "1280,900"
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*connect.facebook.com*",
+    "*hotjar.com*", "*criteo.com*", "*criteo.net*", "*segment.io*", "*segment.com*",
+    "*bing.com/bat*", "*tiktok.com*", "*snapchat.com*", "*adsrvr.org*"
+]
+
+# Chemin de chromedriver mémorisé entre les exécutions (évite la vérification réseau)
+CHROMEDRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "doctolib_scraper", "chromedriver_path")
+_chromedriver_path = None
+
+@instrumented("chromedriver")
+def get_chromedriver_path():
+    """Retourne un chromedriver local: $CHROMEDRIVER_PATH, sinon le chemin mémorisé, sinon téléchargement"""
+    global _chromedriver_path
+    if _chromedriver_path and os.path.exists(_chromedriver_path):
+        return _chromedriver_path
+    
+    path = os.environ.get("CHROMEDRIVER_PATH")
+    if not path or not os.path.exists(path):
+        try:
+            with open(CHROMEDRIVER_CACHE_FILE, encoding="utf-8") as f:
+                path = f.read().strip()
+        except OSError:
+            path = None
+    
+    if not path or not os.path.exists(path):
+        path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(CHROMEDRIVER_CACHE_FILE), exist_ok=True)
+            with open(CHROMEDRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+                f.write(path)
+        except OSError as e:
+            print(f"⚠️ Impossible de mémoriser le chemin de chromedriver: {e}")
+    
+    _chromedriver_path = path
+    return path
+
+def apply_browser_profile(chrome_options, profile):
+    """Ajoute les options du profil "lean": headless, sans images, chargement "eager", petite fenêtre"""
+    if profile not in BROWSER_PROFILES:
+        raise ValueError(f"Profil de navigateur inconnu: {profile}")
+    if profile == "lean":
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument(f"--window-size={LEAN_WINDOW_SIZE}")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--disable-extensions")
+        # Chrome n'a pas de réglage de contenu pour les polices: elles sont bloquées par block_urls (CDP)
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2
+        })
+        chrome_options.page_load_strategy = "eager"
+    return chrome_options
+
+def block_urls(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Bloque les images, polices, analytics et publicités via le protocole CDP"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except Exception as e:
+        print(f"⚠️ Blocage des URL impossible: {e}")
+
+@instrumented("demarrage_navigateur")
+def setup_driver(profile="full", headless=False):
+    """Configure et retourne le driver Selenium (profile="lean" pour un navigateur allégé)
+
+    headless=True masque aussi le navigateur complet (workers des profils en parallèle).
+    """
+    service = Service(get_chromedriver_path())
     chrome_options = webdriver.ChromeOptions()
-    chrome_options.add_argument("--start-maximized")
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    if profile == "full":
+        if headless:
+            chrome_options.add_argument("--headless=new")
+        else:
+            chrome_options.add_argument("--start-maximized")
+    apply_browser_profile(chrome_options, profile)
+    driver = instrument_driver(webdriver.Chrome(service=service, options=chrome_options))
+    if profile == "lean":
+        block_urls(driver)
     return driver
 
+# Bouton d'acceptation des cookies: bannière Didomi, sinon tout bouton "Accepter"
+COOKIE_BUTTON_LOCATORS = [
+    (By.ID, "didomi-notice-agree-button"),
+    (By.XPATH, "//button[contains(text(), 'Accepter') or contains(text(), 'accepter')]")
+]
+
 def accept_cookies(driver, wait):
     """Accepte les cookies si la fenêtre apparaît"""
-    try:
-        cookie_button = wait.until(EC.element_to_be_clickable((By.ID, "didomi-notice-agree-button")))
-        cookie_button.click()
-        print("✓ Cookies acceptés")
-    except:
-        print("Pas de fenêtre de cookies ou délai dépassé.")
+    for i, locator in enumerate(COOKIE_BUTTON_LOCATORS):
+        try:
+            # Le délai complet pour la bannière habituelle, un court délai pour le repli
+            cookie_button = wait_for_clickable(driver, locator, "cookies", timeout=None if i == 0 else 1)
+            if cookie_button is None:
+                continue
+            cookie_button.click()
+            print("✓ Cookies acceptés")
+            return True
+        except:
+            continue
+    print("Pas de fenêtre de cookies ou délai dépassé.")
+    return False
 
 def scroll_to_element(driver, element):
-    """Défile jusqu'à l'élément et attends qu'il soit cliquable"""
+    """Défile jusqu'à l'élément et attends qu'il soit visible"""
     try:
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-        time.sleep(3)  # Pause longue pour laisser la page se stabiliser
+        wait_for_visible(driver, element)
     except Exception as e:
         print(f"Erreur lors du défilement: {e}")
 
 def wait_for_results_page(driver, wait, timeout=10):
     """Vérifie si des résultats sont présents sur la page"""
     print("Vérification des résultats...")
-    time.sleep(2)  # Bref délai pour le chargement
+    wait_for_presence(driver, (By.CSS_SELECTOR, ".dl-text.dl-text-body.dl-text-bold.dl-text-s"), "resultats")
     
     try:
         # Chercher tous les éléments contenant le mot "résultat"
@@ -59,9 +194,57 @@ def wait_for_results_page(driver, wait, timeout=10):
         print(f"❌ Erreur lors de la vérification des résultats: {e}")
         return False
 
-def search_doctors(driver, wait, speciality, location, max_retries=2):
-    """Recherche des médecins par spécialité et localisation"""
+def slugify(text):
+    """Normalise un texte pour une URL: 'Médecin généraliste' -> 'medecin-generaliste'"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+def build_search_url(speciality, location):
+    """Construit l'URL de la page de résultats pour une spécialité et un lieu"""
+    return f"{SEARCH_URL}?{urlencode({'location': slugify(location), 'speciality': slugify(speciality)})}"
+
+@instrumented("recherche")
+def search_doctors(driver, wait, speciality, location, max_retries=2, method="url"):
+    """Recherche des médecins par spécialité et localisation
+
+    method="url" ouvre directement l'URL de recherche et ne passe par le
+    formulaire qu'en cas d'échec; method="form" utilise toujours le formulaire.
+    """
+    if method not in NAVIGATION_METHODS:
+        raise ValueError(f"Mode de navigation inconnu: {method}")
+    
+    if method == "url":
+        if search_doctors_by_url(driver, speciality, location):
+            return True
+        print("Navigation directe sans résultat, repli sur le formulaire de recherche...")
+        polite_get(driver, HOME_URL)
+        wait_for_page_ready(driver)
+        accept_cookies(driver, wait)
+    
+    return search_doctors_by_form(driver, wait, speciality, location, max_retries)
+
+def search_doctors_by_url(driver, speciality, location):
+    """Ouvre directement la page de résultats construite par build_search_url"""
+    search_url = build_search_url(speciality, location)
+    print(f"Recherche de {speciality} à {location} via {search_url}")
+    start = time.perf_counter()
+    try:
+        polite_get(driver, search_url)
+        if wait_for_presence(driver, (By.CSS_SELECTOR, RESULT_CARDS_CSS), "resultats") is None:
+            return False
+    except Exception as e:
+        print(f"Erreur lors de la navigation directe: {e}")
+        return False
+    record_first_result("url", time.perf_counter() - start)
+    record_page_load(driver, "resultats")
+    print("✓ Page de résultats chargée avec succès")
+    return True
+
+def search_doctors_by_form(driver, wait, speciality, location, max_retries=2):
+    """Recherche des médecins en remplissant le formulaire de la page d'accueil"""
     print(f"Recherche de {speciality} à {location}...")
+    start = time.perf_counter()
     
     for attempt in range(max_retries):
         try:
@@ -76,15 +259,14 @@ def search_doctors(driver, wait, speciality, location, max_retries=2):
             speciality_input.clear()
             speciality_input.send_keys(speciality)
             print(f"✓ Spécialité saisie: {speciality}")
-            time.sleep(3)  # Augmenté pour plus de fiabilité
             
             # Attendre les suggestions de spécialité
             try:
-                speciality_suggestions = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".searchbar-suggestion")))
+                speciality_suggestions = wait_for_clickable(
+                    driver, (By.CSS_SELECTOR, ".searchbar-suggestion"), "suggestions")
                 speciality_suggestions.click()
                 print("✓ Suggestion de spécialité sélectionnée")
-                time.sleep(2)
+                wait_for_dom_quiescence(driver)
             except:
                 print("Pas de suggestion pour la spécialité")
             
@@ -94,15 +276,14 @@ def search_doctors(driver, wait, speciality, location, max_retries=2):
             place_input.clear()
             place_input.send_keys(location)
             print(f"✓ Lieu saisi: {location}")
-            time.sleep(3)  # Augmenté pour plus de fiabilité
             
             # Attendre et sélectionner une suggestion de lieu si disponible
             try:
-                place_suggestion = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".searchbar-place-suggestion")))
+                place_suggestion = wait_for_clickable(
+                    driver, (By.CSS_SELECTOR, ".searchbar-place-suggestion"), "suggestions")
                 place_suggestion.click()
                 print("✓ Suggestion de lieu sélectionnée")
-                time.sleep(2)
+                wait_for_dom_quiescence(driver)
             except:
                 print("Pas de suggestion pour le lieu")
             
@@ -111,10 +292,13 @@ def search_doctors(driver, wait, speciality, location, max_retries=2):
                 (By.CSS_SELECTOR, "button.searchbar-submit-button")))
             search_button.click()
             print("✓ Bouton de recherche cliqué")
-            time.sleep(5)  # Augmenté pour permettre le chargement de la page
+            wait_for_page_ready(driver)
             
             # Attendre le chargement de la page de résultats
             if wait_for_results_page(driver, wait):
+                wait_for_presence(driver, (By.CSS_SELECTOR, RESULT_CARDS_CSS), "resultats")
+                record_first_result("form", time.perf_counter() - start)
+                record_page_load(driver, "resultats")
                 print("✓ Page de résultats chargée avec succès")
                 return True
             else:
@@ -122,8 +306,8 @@ def search_doctors(driver, wait, speciality, location, max_retries=2):
                 
                 if attempt < max_retries - 1:
                     print("Retour à la page d'accueil et nouvelle tentative...")
-                    driver.get("https://www.doctolib.fr/")
-                    time.sleep(5)
+                    polite_get(driver, HOME_URL)
+                    wait_for_page_ready(driver)
                     accept_cookies(driver, wait)
                 
         except Exception as e:
@@ -131,119 +315,203 @@ def search_doctors(driver, wait, speciality, location, max_retries=2):
             
             if attempt < max_retries - 1:
                 print("Retour à la page d'accueil et nouvelle tentative...")
-                driver.get("https://www.doctolib.fr/")
-                time.sleep(5)
+                polite_get(driver, HOME_URL)
+                wait_for_page_ready(driver)
                 accept_cookies(driver, wait)
     
     print("❌ Échec de la recherche après plusieurs tentatives")
     return False
 
-def load_more_results(driver, wait):
-    """Charge plus de résultats en cliquant sur le bouton 'Afficher plus de résultats'"""
-    try:
-        load_more_selectors = [
-            "button.dl-button-primary:contains('Afficher plus')",
-            "button.dl-button-primary",
-            ".dl-button-primary",
-            "[data-test='load-more-button']"
-        ]
-        
-        for selector in load_more_selectors:
-            try:
-                # Faire défiler jusqu'en bas de la page
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
-                
-                # Vérifier si le bouton existe
-                load_more_buttons = driver.find_elements(By.CSS_SELECTOR, selector)
-                for button in load_more_buttons:
-                    if "plus" in button.text.lower() or "more" in button.text.lower():
-                        print("Chargement de résultats supplémentaires...")
-                        scroll_to_element(driver, button)
-                        button.click()
-                        time.sleep(5)  # Attendre le chargement des nouveaux résultats
-                        return True
-            except:
-                continue
-        
-        print("Aucun bouton 'Afficher plus' trouvé ou tous les résultats ont été chargés.")
+def _keep_doctor(info, label, doctors_data, sink, checkpoint=None, dedup=None):
+    """Conserve un médecin s'il a au moins un nom; avec un sink, il est écrit aussitôt au lieu d'être gardé en mémoire"""
+    if info["Nom complet"] == "Non spécifié":
+        print(f"⚠️ Médecin {label}: Informations incomplètes")
         return False
-    except Exception as e:
-        print(f"Erreur lors du chargement de résultats supplémentaires: {e}")
+    if checkpoint is not None:
+        key = card_key(info)
+        if checkpoint.is_done(CARD, key):
+            print(f"↷ Médecin {label}: déjà extrait lors d'une exécution précédente")
+            return False
+    if dedup is not None and not dedup.add(info):
+        print(f"↷ Médecin {label}: doublon de {info['Nom complet']} ignoré")
         return False
+    if sink is not None:
+        sink.write(info)
+    else:
+        doctors_data.append(info)
+    if checkpoint is not None:
+        checkpoint.mark_done(CARD, key, info)
+    print(f"✓ Médecin {label}: {info['Nom complet']}")
+    return True
 
-def scrape_doctors(driver, wait, max_results=None):
-    """Récupère les informations des médecins sur la page actuelle"""
-    doctors_data = []
-    
+def find_result_cards(driver):
+    """Cartes de la page de résultats, avec le premier sélecteur qui en trouve"""
+    for selector in selector_registry.order("cartes", CARD_SELECTORS):
+        try:
+            cards = driver.find_elements(By.CSS_SELECTOR, selector)
+            if cards:
+                selector_registry.record("cartes", selector)
+                return cards
+        except:
+            continue
+    return []
+
+def result_page_url(search_url, page):
+    """URL de la page `page` d'une recherche (paramètre page de l'URL de résultats)"""
+    parts = urlsplit(search_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != "page"]
+    if page > 1:
+        query.append(("page", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+@instrumented("page_resultats")
+def load_result_page(driver, url):
+    """Ouvre une page de résultats et attend ses cartes"""
+    polite_get(driver, url)
+    wait_for_page_ready(driver)
+    wait_for_presence(driver, (By.CSS_SELECTOR, RESULT_CARDS_CSS), "resultats")
+    record_page_load(driver, "resultats")
+
+def _first_card_text(cards):
     try:
-        # Charger plus de résultats si le nombre maximum n'est pas atteint
-        if max_results is None or max_results > 20:
-            # Essayer de charger plus de résultats jusqu'à 5 fois
-            for i in range(5):
-                if not load_more_results(driver, wait):
-                    break
-                print(f"Page {i+2} de résultats chargée")
-                time.sleep(3)
-        
-        # Essayez différents sélecteurs pour les cartes de médecins
-        doctor_cards = []
-        card_selectors = [
-            "div[data-test='search-result']",
-            ".dl-search-result", 
-            ".dl-search-result-presentation",
-            ".search-result-card"
-        ]
-        
-        for selector in card_selectors:
-            try:
-                doctor_cards = driver.find_elements(By.CSS_SELECTOR, selector)
-                if len(doctor_cards) > 0:
-                    print(f"✓ {len(doctor_cards)} médecins trouvés avec le sélecteur: {selector}")
-                    break
-            except:
-                continue
-        
-        if not doctor_cards:
-            print("❌ Aucune carte de médecin trouvée.")
-            return doctors_data
-        
-        # Limiter le nombre de résultats si spécifié
-        if max_results and max_results < len(doctor_cards):
-            doctor_cards = doctor_cards[:max_results]
-            print(f"Limitation à {max_results} résultats.")
-        
-        # Extraire les données de chaque carte
-        for i, card in enumerate(tqdm(doctor_cards, desc="Extraction des données")):
-            try:
+        return cards[0].text
+    except Exception:
+        return None
+
+def iter_result_pages(driver, wait, max_pages=None, start_page=1):
+    """Parcourt les pages de résultats (&page=N) jusqu'à épuisement
+
+    Génère (numéro de page, cartes). Chaque page est ouverte à sa propre URL:
+    le DOM ne contient jamais qu'une page de cartes et engine="html" n'analyse
+    que la page courante. Le parcours s'arrête sur une page sans cartes ou dont
+    la première carte est celle de la page précédente (site qui ignore le
+    paramètre page). start_page ouvre directement une page plus lointaine (reprise).
+    """
+    search_url = driver.current_url
+    page = start_page
+    if max_pages and page > max_pages:
+        return
+    if page > 1:
+        load_result_page(driver, result_page_url(search_url, page))
+    previous = None
+    while True:
+        cards = find_result_cards(driver)
+        first = _first_card_text(cards) if cards else None
+        if first is not None and first == previous:
+            return
+        yield page, cards
+        if not cards or (max_pages and page >= max_pages):
+            return
+        previous = first
+        page += 1
+        load_result_page(driver, result_page_url(search_url, page))
+
+def _extract_cards(driver, doctor_cards, engine, page, offset, doctors_data, sink, checkpoint, dedup,
+                   snapshot_dir):
+    """Extrait les cartes d'une page avec le moteur choisi; retourne le nombre de médecins conservés"""
+    kept = 0
+    if engine == "html":
+        from html_engine import parse_cards_html, snapshot_page
+        filename = "resultats.html" if page == 1 else f"resultats_page{page}.html"
+        with stage("page_cartes_html"):
+            page_source = snapshot_page(driver, snapshot_dir, filename)
+            infos = parse_cards_html(page_source, len(doctor_cards))
+        for i, info in enumerate(infos):
+            kept += _keep_doctor(info, f"{offset+i+1}", doctors_data, sink, checkpoint, dedup)
+        return kept
+    
+    if engine == "js":
+        # Une seule requête au navigateur pour toutes les cartes de la page
+        with stage("page_cartes_js"):
+            infos = extract_doctors_info_batch(driver, doctor_cards)
+        for i, info in enumerate(infos):
+            kept += _keep_doctor(info, f"{offset+i+1}", doctors_data, sink, checkpoint, dedup)
+        return kept
+    
+    # Extraire les données de chaque carte
+    for i, card in enumerate(tqdm(doctor_cards, desc=f"Extraction des données (page {page})")):
+        try:
+            with stage("carte"):
                 # Faire défiler jusqu'à la carte pour s'assurer qu'elle est visible
                 scroll_to_element(driver, card)
                 
                 # Extraire les informations du médecin
                 info = extract_doctor_info(card)
+            
+            # Ajouter à la liste (ou écrire dans le sink) si on a au moins le nom
+            kept += _keep_doctor(info, f"{offset+i+1}", doctors_data, sink, checkpoint, dedup)
                 
-                # Ajouter à la liste si on a au moins le nom
-                if info["Nom complet"] != "Non spécifié":
-                    doctors_data.append(info)
-                    print(f"✓ Médecin {i+1}/{len(doctor_cards)}: {info['Nom complet']}")
-                else:
-                    print(f"⚠️ Médecin {i+1}/{len(doctor_cards)}: Informations incomplètes")
-                    
-            except StaleElementReferenceException:
-                print(f"⚠️ Élément devenu périmé, médecin {i+1}/{len(doctor_cards)} ignoré")
-                continue
-            except Exception as e:
-                print(f"⚠️ Erreur pour médecin {i+1}/{len(doctor_cards)}: {e}")
-                continue
+        except StaleElementReferenceException:
+            print(f"⚠️ Élément devenu périmé, médecin {offset+i+1} ignoré")
+            continue
+        except Exception as e:
+            print(f"⚠️ Erreur pour médecin {offset+i+1}: {e}")
+            continue
+    return kept
+
+def scrape_doctors(driver, wait, max_results=None, engine="webdriver", snapshot_dir=None, sink=None,
+                   checkpoint=None, max_pages=None, dedup=None):
+    """Récupère les informations des médecins de toutes les pages de résultats
+
+    Les pages sont ouvertes une à une (&page=N) jusqu'à épuisement, à
+    max_results cartes ou à max_pages pages; seule la page courante est dans
+    le DOM.
+    engine="webdriver" interroge chaque carte via WebDriver, engine="js" extrait
+    toutes les cartes d'une page en un seul appel execute_script, engine="html"
+    analyse un instantané de page_source avec lxml (enregistré dans snapshot_dir si fourni).
+    Si sink est fourni (ex: StreamingCsvWriter), chaque médecin y est écrit dès
+    son extraction et la liste retournée reste vide.
+    Si checkpoint est fourni (CheckpointStore), les cartes déjà extraites lors
+    d'une exécution précédente sont ignorées et chaque nouvelle carte y est notée;
+    le nombre de pages entièrement extraites y est aussi gardé ("pages_chargees",
+    avec "cartes_traitees"): une reprise ouvre directement la page suivante.
+    Si dedup est fourni (DedupIndex), les médecins déjà vus (autres pages, autres
+    requêtes ou exécutions précédentes) sont écartés.
+    """
+    if engine not in EXTRACTION_ENGINES:
+        raise ValueError(f"Moteur d'extraction inconnu: {engine}")
+    doctors_data = []
+    kept = 0
+    resumed_pages = checkpoint.get_state("pages_chargees", 0) if checkpoint is not None else 0
+    processed = checkpoint.get_state("cartes_traitees", 0) if resumed_pages else 0
+    if resumed_pages:
+        print(f"↷ {resumed_pages} pages déjà extraites lors d'une exécution précédente: reprise à la page {resumed_pages + 1}")
+    
+    try:
+        pages = iter_result_pages(driver, wait, max_pages, start_page=resumed_pages + 1)
+        if max_results and processed >= max_results:
+            pages = ()
+        for page, doctor_cards in pages:
+            if not doctor_cards:
+                if page == 1:
+                    selector_registry.record("cartes", None)
+                    print("❌ Aucune carte de médecin trouvée.")
+                break
+            
+            # Limiter le nombre de résultats si spécifié
+            if max_results:
+                doctor_cards = doctor_cards[:max_results - processed]
+            print(f"✓ Page {page}: {len(doctor_cards)} cartes")
+            
+            kept += _extract_cards(driver, doctor_cards, engine, page, processed, doctors_data, sink,
+                                   checkpoint, dedup, snapshot_dir)
+            processed += len(doctor_cards)
+            if checkpoint is not None:
+                checkpoint.set_state("cartes_traitees", processed)
+                checkpoint.set_state("pages_chargees", page)
+            
+            if max_results and processed >= max_results:
+                print(f"Limitation à {max_results} résultats.")
+                break
                 
     except Exception as e:
         print(f"❌ Erreur lors de la récupération des médecins: {e}")
     
-    print(f"✓ Extraction terminée: {len(doctors_data)} médecins avec données complètes")
+    print(f"✓ Extraction terminée: {kept} médecins avec données complètes sur {processed} cartes")
     return doctors_data
 
-def extract_doctor_info(card):
-    """Extrait les informations d'un médecin à partir de sa carte"""
+def build_doctor_info(raw):
+    """Construit le dictionnaire d'un médecin à partir des textes bruts de sa carte"""
     info = {
         "Nom complet": "Non spécifié",
         "Spécialité": "Non spécifié",
@@ -255,133 +523,157 @@ def extract_doctor_info(card):
         "Ville": "Non spécifié"
     }
     
+    if raw.get("name"):
+        info["Nom complet"] = raw["name"]
+    if raw.get("specialty"):
+        info["Spécialité"] = raw["specialty"]
+    if raw.get("availability"):
+        info["Prochaine disponibilité"] = raw["availability"]
+    # Lien vers le profil (hors colonnes CSV): sert aux extractions avec profils et à la déduplication
+    if raw.get("url"):
+        info["url"] = raw["url"]
+    
+    # Adresse: lignes de la rue, puis "code postal ville" (CEDEX retiré de la ville)
+    address_text = raw.get("address")
+    if address_text:
+        street, postal_code, city = parse_address(address_text)
+        if street:
+            info["Rue"] = street
+        if postal_code:
+            info["Code postal"] = postal_code
+        if city:
+            info["Ville"] = city
+    
+    # Secteur d'assurance et prix
+    for text in raw.get("price_texts", []):
+        lowered = text.lower()
+        if "conventionné" in lowered or "secteur" in lowered:
+            info["Secteur d'assurance"] = text
+        elif "€" in lowered:
+            info["Prix estimé"] = text
+    
+    return info
+
+def extract_doctor_info(card):
+    """Extrait les informations d'un médecin à partir de sa carte"""
+    raw = {"price_texts": []}
+    
     try:
-        # Nom (plusieurs sélecteurs possibles)
-        name_selectors = [
-            "a[data-test='search-result-name']",
-            "h3.dl-search-result-name",
-            ".dl-search-result-name"
-        ]
+        # Nom, spécialité, disponibilité, adresse (plusieurs sélecteurs possibles, le dernier gagnant d'abord)
+        for field, selectors in CARD_FIELD_SELECTORS.items():
+            group = f"carte.{field}"
+            matched = None
+            for selector in selector_registry.order(group, selectors):
+                try:
+                    element = card.find_element(By.CSS_SELECTOR, selector)
+                    text = element.text.strip()
+                    if text:
+                        raw[field] = text
+                        matched = selector
+                        break
+                except:
+                    continue
+            selector_registry.record(group, matched)
         
-        for selector in name_selectors:
+        # Lien vers la page de profil
+        for selector in CARD_LINK_SELECTORS:
             try:
-                name_element = card.find_element(By.CSS_SELECTOR, selector)
-                name_text = name_element.text.strip()
-                if name_text:
-                    info["Nom complet"] = name_text
+                href = card.find_element(By.CSS_SELECTOR, selector).get_attribute("href")
+                if href:
+                    raw["url"] = href
                     break
             except:
                 continue
         
-        # Spécialité (plusieurs sélecteurs possibles)
-        specialty_selectors = [
-            "div.dl-search-result-subtitle",
-            ".dl-search-result-specialty",
-            "[data-test='search-result-specialty']"
-        ]
-        
-        for selector in specialty_selectors:
+        # Secteur d'assurance et prix
+        for selector in PRICE_SELECTORS:
             try:
-                specialty_element = card.find_element(By.CSS_SELECTOR, selector)
-                specialty_text = specialty_element.text.strip()
-                if specialty_text:
-                    info["Spécialité"] = specialty_text
-                    break
+                elements = card.find_elements(By.CSS_SELECTOR, selector)
+                for element in elements:
+                    text = element.text.strip()
+                    if text:
+                        raw["price_texts"].append(text)
             except:
                 continue
         
-        # Disponibilité
-        try:
-            availability_selectors = [
-                "div[data-test='availability-date']",
-                ".availabilities-slot",
-                ".dl-search-result-availability"
-            ]
-            
-            for selector in availability_selectors:
-                try:
-                    availability = card.find_element(By.CSS_SELECTOR, selector)
-                    availability_text = availability.text.strip()
-                    if availability_text:
-                        info["Prochaine disponibilité"] = availability_text
-                        break
-                except:
-                    continue
-        except:
-            pass
-        
-        # Adresse
-        try:
-            address_selectors = [
-                "div[data-test='search-result-practice-address']",
-                ".dl-text.dl-text-body.dl-text-regular.dl-text-s.dl-search-result-address",
-                ".dl-search-result-address"
-            ]
-            
-            for selector in address_selectors:
-                try:
-                    address_element = card.find_element(By.CSS_SELECTOR, selector)
-                    address_text = address_element.text.strip()
-                    if address_text:
-                        address_parts = address_text.split('\n')
-                        
-                        if len(address_parts) >= 1:
-                            info["Rue"] = address_parts[0].strip()
-                            
-                        if len(address_parts) >= 2:
-                            city_info = address_parts[-1].strip()
-                            if ' ' in city_info:
-                                postal_code, city = city_info.split(' ', 1)
-                                info["Code postal"] = postal_code.strip()
-                                info["Ville"] = city.strip()
-                        break
-                except:
-                    continue
-        except:
-            pass
-        
-        # Secteur d'assurance et prix
-        try:
-            price_selectors = [
-                ".dl-search-result-price",
-                "[data-test='search-result-price']",
-                ".dl-text-body"
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    elements = card.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        text = element.text.strip().lower()
-                        if "conventionné" in text or "secteur" in text:
-                            info["Secteur d'assurance"] = element.text.strip()
-                        elif "€" in text:
-                            info["Prix estimé"] = element.text.strip()
-                except:
-                    continue
-        except:
-            pass
-        
-        time.sleep(1)  # Attendre un peu entre chaque extraction
-        return info
-        
     except Exception as e:
         print(f"Erreur lors de l'extraction des données: {e}")
-        return info
+    
+    return build_doctor_info(raw)
+
+# Script exécuté dans le navigateur: applique les mêmes sélecteurs de repli que
+# extract_doctor_info, pour toutes les cartes, en un seul aller-retour WebDriver.
+_BATCH_EXTRACT_JS = """
+var cards = arguments[0], fieldSelectors = arguments[1], priceSelectors = arguments[2];
+var linkSelectors = arguments[3];
+function textOf(el) { return (el.innerText || el.textContent || '').trim(); }
+return cards.map(function(card) {
+    var raw = {price_texts: [], matched: {}};
+    try {
+        Object.keys(fieldSelectors).forEach(function(field) {
+            var selectors = fieldSelectors[field];
+            for (var i = 0; i < selectors.length; i++) {
+                var el = card.querySelector(selectors[i]);
+                var text = el ? textOf(el) : '';
+                if (text) { raw[field] = text; raw.matched[field] = selectors[i]; break; }
+            }
+        });
+        for (var j = 0; j < linkSelectors.length; j++) {
+            var link = card.querySelector(linkSelectors[j]);
+            if (link && link.href) { raw.url = link.href; break; }
+        }
+        priceSelectors.forEach(function(selector) {
+            card.querySelectorAll(selector).forEach(function(el) {
+                var text = textOf(el);
+                if (text) { raw.price_texts.push(text); }
+            });
+        });
+    } catch (e) {
+        raw.error = String(e);
+    }
+    return raw;
+});
+"""
+
+def extract_card_texts(driver, cards, fields=None, prices=True, links=True):
+    """Textes bruts des cartes en un seul appel execute_script
+
+    fields limite l'extraction à certains champs de CARD_FIELD_SELECTORS (ex: name et
+    availability pour un rafraîchissement); prices=False saute secteur et prix,
+    links=False le lien vers le profil.
+    """
+    if not cards:
+        return []
+    fields = list(fields or CARD_FIELD_SELECTORS)
+    field_selectors = {field: selector_registry.order(f"carte.{field}", CARD_FIELD_SELECTORS[field])
+                       for field in fields}
+    raws = driver.execute_script(_BATCH_EXTRACT_JS, list(cards), field_selectors,
+                                 PRICE_SELECTORS if prices else [], CARD_LINK_SELECTORS if links else [])
+    for raw in raws:
+        matched = raw.get("matched") or {}
+        for field in fields:
+            selector_registry.record(f"carte.{field}", matched.get(field))
+    return raws
+
+def extract_doctors_info_batch(driver, cards):
+    """Extrait les informations de toutes les cartes en un seul appel execute_script"""
+    return [build_doctor_info(raw) for raw in extract_card_texts(driver, cards)]
+
+def save_to_csv(doctors_data, filename="resultats_doctolib.csv", dedup=None):
+    """Sauvegarde les informations des médecins dans un fichier CSV, sans doublons
 
-def save_to_csv(doctors_data, filename="resultats_doctolib.csv"):
-    """Sauvegarde les informations des médecins dans un fichier CSV"""
+    Avec dedup (DedupIndex), les médecins déjà connus de l'index sont aussi écartés.
+    """
+    if dedup is None:
+        dedup = DedupIndex()
+    doctors_data = dedup.unique(doctors_data)
     if not doctors_data:
         print("❌ Aucune donnée à sauvegarder.")
         return False
     
     try:
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                "Nom complet", "Spécialité", "Prochaine disponibilité", 
-                "Secteur d'assurance", "Prix estimé", "Rue", "Code postal", "Ville"
-            ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES, extrasaction="ignore")
             
             writer.writeheader()
             for doctor in doctors_data:
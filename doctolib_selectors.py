@@ -0,0 +1,218 @@
+"""Sélecteurs CSS utilisés pour extraire les cartes de résultats et les pages de profil.
+
+Chaque liste est essayée dans l'ordre: le premier sélecteur qui donne un texte non vide l'emporte.
+SelectorRegistry apprend quel sélecteur fonctionne et le propose en premier.
+"""
+import json
+import os
+import threading
+
+# Cartes de médecins sur la page de résultats
+CARD_SELECTORS = [
+    "div[data-test='search-result']",
+    ".dl-search-result",
+    ".dl-search-result-presentation",
+    ".search-result-card"
+]
+
+# Champs d'une carte
+CARD_FIELD_SELECTORS = {
+    "name": [
+        "a[data-test='search-result-name']",
+        "h3.dl-search-result-name",
+        ".dl-search-result-name"
+    ],
+    "specialty": [
+        "div.dl-search-result-subtitle",
+        ".dl-search-result-specialty",
+        "[data-test='search-result-specialty']"
+    ],
+    "availability": [
+        "div[data-test='availability-date']",
+        ".availabilities-slot",
+        ".dl-search-result-availability"
+    ],
+    "address": [
+        "div[data-test='search-result-practice-address']",
+        ".dl-text.dl-text-body.dl-text-regular.dl-text-s.dl-search-result-address",
+        ".dl-search-result-address"
+    ]
+}
+
+# Lien vers la page de profil d'une carte
+CARD_LINK_SELECTORS = [
+    "a[data-test='search-result-name']",
+    "a.dl-search-result-name",
+    "a[href*='/']"
+]
+
+# Secteur et prix: tous les éléments de tous les sélecteurs sont examinés
+PRICE_SELECTORS = [
+    ".dl-search-result-price",
+    "[data-test='search-result-price']",
+    ".dl-text-body"
+]
+
+# Champs d'une page de profil
+PROFILE_FIELD_SELECTORS = {
+    "name": [
+        "h1.dl-text.dl-text-bold.dl-text-title.dl-text-xl.dl-profile-header-name"
+    ],
+    "specialty": [
+        ".dl-profile-header-speciality"
+    ],
+    "address": [
+        ".dl-text.dl-text-body.dl-text-regular.dl-text-s.dl-text-neutral-130"
+    ],
+    "availability": [
+        "div.availabilities-slot",
+        "div.booking-availabilities"
+    ],
+    "tarif": [
+        ".dl-profile-fee"
+    ],
+    "convention": [
+        "div.dl-profile-text p"
+    ]
+}
+
+# Repli pour l'adresse d'un profil: éléments "address"/"location" contenant un type de voie
+PROFILE_ADDRESS_FALLBACK_XPATH = "//*[contains(@class, 'address') or contains(@class, 'location')]"
+PROFILE_ADDRESS_KEYWORDS = ["rue", "avenue", "boulevard", "place"]
+
+# Ordre appris des sélecteurs, conservé entre les exécutions
+SELECTOR_STATS_FILE = os.path.join(os.path.expanduser("~"), ".cache", "doctolib_scraper", "selectors.json")
+
+class SelectorRegistry:
+    """Ordre adaptatif des sélecteurs de repli, par groupe (ex: "carte.name").
+
+    Chaque recherche note le sélecteur qui a fonctionné (record); les candidats
+    d'un groupe sont ensuite proposés du plus souvent gagnant au moins souvent
+    (à égalité, dans l'ordre des listes ci-dessus), pour que le premier essai
+    réussisse. Les succès sont pondérés par leur ancienneté (chaque recherche
+    multiplie les scores du groupe par decay): un score ne dépasse pas
+    1 / (1 - decay), si bien qu'un nouveau gagnant passe en tête après une
+    quinzaine de succès consécutifs, quel que soit l'historique. Un groupe où
+    aucun sélecteur ne correspond warn_after fois de suite est signalé: la mise
+    en page de Doctolib a probablement changé.
+    """
+
+    def __init__(self, warn_after=20, decay=0.95):
+        self.warn_after = warn_after
+        self.decay = decay
+        self.path = None
+        self._hits = {}        # {groupe: {sélecteur: succès}}
+        self._scores = {}      # {groupe: {sélecteur: succès pondérés par leur ancienneté}}
+        self._misses = {}      # {groupe: recherches sans aucun sélecteur valide}
+        self._streaks = {}     # {groupe: échecs consécutifs}
+        self._defaults = {}    # {groupe: candidats dans l'ordre du code}
+        self._orders = {}      # {groupe: candidats dans l'ordre appris}
+        self.flagged = set()
+        self._lock = threading.Lock()
+
+    def order(self, group, defaults):
+        """Candidats du groupe, le plus souvent gagnant en premier"""
+        order = self._orders.get(group)
+        if order is None or self._defaults.get(group) != defaults:
+            with self._lock:
+                self._defaults[group] = list(defaults)
+                order = self._sort(group)
+        return order
+
+    def _sort(self, group):
+        defaults = self._defaults[group]
+        scores = self._scores.get(group, {})
+        order = sorted(defaults, key=lambda selector: (-scores.get(selector, 0), defaults.index(selector)))
+        self._orders[group] = order
+        return order
+
+    def record(self, group, selector):
+        """Note le sélecteur gagnant d'une recherche (None si aucun n'a correspondu)"""
+        with self._lock:
+            if selector is None:
+                self._misses[group] = self._misses.get(group, 0) + 1
+                streak = self._streaks[group] = self._streaks.get(group, 0) + 1
+                if streak == self.warn_after and group not in self.flagged:
+                    self.flagged.add(group)
+                    print(f"⚠️ Aucun sélecteur ne correspond pour {group} ({streak} fois de suite): "
+                          f"la mise en page a peut-être changé")
+                return
+            self._streaks[group] = 0
+            hits = self._hits.setdefault(group, {})
+            hits[selector] = hits.get(selector, 0) + 1
+            scores = self._scores.setdefault(group, {})
+            for candidate in scores:
+                scores[candidate] *= self.decay
+            scores[selector] = scores.get(selector, 0) + 1
+            order = self._orders.get(group)
+            # Réordonner seulement si le gagnant n'est pas déjà en tête
+            if order and order[0] != selector and scores[selector] > scores.get(order[0], 0):
+                self._sort(group)
+
+    def hit_rates(self):
+        """Taux de succès par groupe et par sélecteur"""
+        with self._lock:
+            groups = set(self._hits) | set(self._misses)
+            rates = {}
+            for group in sorted(groups):
+                hits = self._hits.get(group, {})
+                lookups = sum(hits.values()) + self._misses.get(group, 0)
+                rates[group] = {
+                    "lookups": lookups,
+                    "misses": self._misses.get(group, 0),
+                    "selectors": {selector: count / lookups for selector, count in
+                                  sorted(hits.items(), key=lambda item: -item[1])} if lookups else {},
+                }
+            return rates
+
+    def load(self, path=SELECTOR_STATS_FILE):
+        """Reprend l'ordre appris lors des exécutions précédentes"""
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        # Fichiers antérieurs aux scores: les succès cumulés sont plafonnés au score maximal
+        cap = 1 / (1 - self.decay)
+        with self._lock:
+            for group, stats in data.get("groups", {}).items():
+                self._hits[group] = dict(stats.get("hits", {}))
+                self._misses[group] = stats.get("misses", 0)
+                self._scores[group] = dict(stats.get("scores") or
+                                           {selector: min(count, cap) for selector, count in self._hits[group].items()})
+            for group in list(self._orders):
+                self._sort(group)
+        return self
+
+    def save(self, path=None):
+        """Enregistre les succès par sélecteur (écriture atomique)"""
+        path = path or self.path or SELECTOR_STATS_FILE
+        with self._lock:
+            groups = {group: {"hits": self._hits.get(group, {}), "scores": self._scores.get(group, {}),
+                              "misses": self._misses.get(group, 0)}
+                      for group in set(self._hits) | set(self._misses)}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            temporary = f"{path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump({"groups": groups}, f, ensure_ascii=False, indent=2)
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"⚠️ Impossible d'enregistrer l'ordre des sélecteurs: {e}")
+
+    def report(self):
+        """Affiche le sélecteur gagnant de chaque groupe et les groupes sans correspondance"""
+        rates = self.hit_rates()
+        if not rates:
+            return
+        print("\n=== Sélecteurs ===")
+        for group, stats in rates.items():
+            if stats["selectors"]:
+                selector, rate = next(iter(stats["selectors"].items()))
+                print(f"{group:<22} {rate:5.0%} {selector}  ({stats['lookups']} recherches, {stats['misses']} sans résultat)")
+            else:
+                print(f"{group:<22} ⚠️ aucun sélecteur n'a jamais correspondu ({stats['misses']} recherches)")
+
+# Registre partagé par les moteurs d'extraction (load()/save() dans les points d'entrée)
+selector_registry = SelectorRegistry()
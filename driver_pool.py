@@ -0,0 +1,152 @@
+"""Pool de sessions Chrome réutilisables.
+
+Les sessions sont préchauffées (page d'accueil chargée, cookies acceptés) puis
+recyclées après un nombre de pages chargées (navigations, pages de résultats,
+profils) ou un seuil de mémoire (si psutil est installé).
+"""
+import threading
+import time
+from contextlib import contextmanager
+from selenium.webdriver.support.ui import WebDriverWait
+from doctolib_scraper import setup_driver, accept_cookies, HOME_URL
+from waits import wait_for_page_ready
+from browser_metrics import RSS_AVAILABLE, browser_rss_mb, pages_loaded
+from rate_limiter import polite_get
+
+class DriverSession:
+    """Une session Chrome du pool et son usage"""
+
+    def __init__(self, driver, wait_timeout=15):
+        self.driver = driver
+        self.wait = WebDriverWait(driver, wait_timeout)
+        self.pages = 0       # pages chargées, préchauffage compris
+        self.searches = 0    # emprunts terminés (recherches)
+        self._checkout = 0   # compteur de pages du driver au début de l'emprunt
+        self.created_at = time.perf_counter()
+
+    def warm_up(self, url=HOME_URL):
+        """Charge la page d'accueil et accepte les cookies une fois pour toutes"""
+        polite_get(self.driver, url)
+        wait_for_page_ready(self.driver)
+        accept_cookies(self.driver, self.wait)
+
+    def checkout(self):
+        self._checkout = pages_loaded(self.driver)
+
+    def loaded_since_checkout(self):
+        """Pages chargées par le driver depuis le début de l'emprunt (ou sa création)"""
+        return pages_loaded(self.driver) - self._checkout
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+class DriverPool:
+    """Pool de sessions Chrome partagées entre plusieurs recherches (et threads)"""
+
+    def __init__(self, size=1, max_pages=200, max_rss_mb=1500, driver_factory=setup_driver,
+                 warm_url=HOME_URL):
+        self.size = size
+        self.max_pages = max_pages
+        if max_rss_mb and not RSS_AVAILABLE:
+            print("⚠️ psutil absent: recyclage des sessions au-delà de max_rss_mb désactivé (pip install psutil)")
+            max_rss_mb = None
+        self.max_rss_mb = max_rss_mb
+        self.driver_factory = driver_factory
+        self.warm_url = warm_url
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self.recycled = 0
+
+    def _new_session(self):
+        session = DriverSession(self.driver_factory())
+        if self.warm_url:
+            try:
+                session.warm_up(self.warm_url)
+            except Exception as e:
+                print(f"⚠️ Préchauffage de la session impossible: {e}")
+        return session
+
+    def acquire(self, timeout=None):
+        """Retourne une session libre, en crée une si le pool n'est pas plein, sinon attend"""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Le pool de drivers est fermé")
+                if self._idle:
+                    session = self._idle.pop()
+                    session.checkout()
+                    return session
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                if not self._condition.wait(timeout):
+                    raise TimeoutError("Aucune session disponible dans le pool")
+        try:
+            return self._new_session()
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    def _needs_recycling(self, session):
+        if self.max_pages and session.pages >= self.max_pages:
+            return True
+        if self.max_rss_mb:
+            rss = browser_rss_mb(session.driver)
+            if rss is not None and rss >= self.max_rss_mb:
+                return True
+        return False
+
+    def release(self, session, pages=None, broken=False):
+        """Rend une session au pool; elle est recyclée si usée, trop lourde ou cassée
+
+        pages: pages chargées pendant l'emprunt; par défaut celles comptées sur le
+        driver par polite_get et iter_result_pages.
+        """
+        session.pages += session.loaded_since_checkout() if pages is None else pages
+        session.searches += 1
+        if broken or self._closed or self._needs_recycling(session):
+            session.quit()
+            with self._condition:
+                self._created -= 1
+                self.recycled += 1
+                self._condition.notify()
+            return
+        with self._condition:
+            self._idle.append(session)
+            self._condition.notify()
+
+    @contextmanager
+    def session(self, pages=None):
+        """with pool.session() as session: ... (la session est rendue à la sortie)"""
+        session = self.acquire()
+        broken = False
+        try:
+            yield session
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(session, pages=pages, broken=broken)
+
+    def close(self):
+        """Ferme toutes les sessions inactives; les sessions en cours seront fermées à leur retour"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._condition.notify_all()
+        for session in idle:
+            session.quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,78 @@
+"""Serveur HTTP local qui rejoue des pages Doctolib enregistrées (dossier fixtures/:
+pages de résultats dans search/, pages de profil dans profiles/).
+
+Permet de mesurer les moteurs d'extraction hors ligne:
+
+    with serve_fixtures() as base_url:
+        fetch_profiles([f"{base_url}/profiles/dr-martin-lyon"])
+
+Une URL sans extension est servie depuis le fichier .html correspondant.
+"""
+import argparse
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Sert les fichiers de fixtures, avec une latence simulée optionnelle"""
+
+    latency = 0.0
+
+    def translate_path(self, path):
+        local = super().translate_path(path)
+        if not os.path.splitext(local)[1] and os.path.exists(local + ".html"):
+            return local + ".html"
+        return local
+
+    def end_headers(self):
+        self.send_header("Cache-Control", "no-store")
+        super().end_headers()
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+def list_fixture_urls(base_url, section, directory=FIXTURES_DIR):
+    """URLs de toutes les pages enregistrées d'une section (ex: "profiles")"""
+    names = sorted(os.listdir(os.path.join(directory, section)))
+    return [f"{base_url}/{section}/{os.path.splitext(name)[0]}" for name in names if name.endswith(".html")]
+
+@contextmanager
+def serve_fixtures(directory=FIXTURES_DIR, port=0, latency=0.0):
+    """Démarre le serveur dans un thread et retourne son URL de base"""
+    handler = type("Handler", (FixtureHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(handler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local de pages Doctolib enregistrées")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence simulée par requête (s)")
+    parser.add_argument("--directory", type=str, default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    with serve_fixtures(args.directory, args.port, args.latency) as base_url:
+        print(f"Fixtures servies sur {base_url} (Ctrl+C pour arrêter)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Moteur d'extraction hors ligne: analyse un instantané HTML (driver.page_source) avec lxml.
+
+Utilise les mêmes listes de sélecteurs que les moteurs WebDriver, pour produire
+exactement les mêmes dictionnaires, sans aller-retour avec le navigateur.
+"""
+import argparse
+import csv
+import os
+from urllib.parse import urljoin
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from doctolib_selectors import (
+    CARD_SELECTORS,
+    CARD_FIELD_SELECTORS,
+    CARD_LINK_SELECTORS,
+    PRICE_SELECTORS,
+    PROFILE_FIELD_SELECTORS,
+    PROFILE_ADDRESS_FALLBACK_XPATH,
+    PROFILE_ADDRESS_KEYWORDS,
+    selector_registry
+)
+from doctolib_scraper import HOME_URL, build_doctor_info, save_to_csv
+
+# Balises rendues sur leur propre ligne par le navigateur (approximation de innerText)
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul"
+}
+_SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+
+_compiled_selectors = {}
+
+def _select(element, selector):
+    """Applique un sélecteur CSS (compilé une seule fois)"""
+    compiled = _compiled_selectors.get(selector)
+    if compiled is None:
+        compiled = _compiled_selectors[selector] = CSSSelector(selector)
+    return compiled(element)
+
+def inner_text(element):
+    """Texte d'un élément avec les retours à la ligne des blocs, comme WebElement.text"""
+    chunks = []
+
+    def walk(node):
+        tag = node.tag if isinstance(node.tag, str) else ""
+        if tag in _SKIPPED_TAGS:
+            return
+        if tag == "br":
+            chunks.append("\n")
+        elif tag in _BLOCK_TAGS:
+            chunks.append("\n")
+        if node.text and tag:
+            chunks.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                chunks.append(child.tail)
+        if tag in _BLOCK_TAGS:
+            chunks.append("\n")
+
+    walk(element)
+    lines = (" ".join(line.split()) for line in "".join(chunks).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+def _first_text(element, selectors, group):
+    """Texte du premier sélecteur qui donne un résultat non vide (le dernier gagnant du groupe d'abord)"""
+    for selector in selector_registry.order(group, selectors):
+        found = _select(element, selector)
+        if found:
+            text = inner_text(found[0])
+            if text:
+                selector_registry.record(group, selector)
+                return text
+    selector_registry.record(group, None)
+    return None
+
+def parse_card(card):
+    """Extrait les informations d'une carte lxml (équivalent de extract_doctor_info)"""
+    raw = {"price_texts": []}
+    for field, selectors in CARD_FIELD_SELECTORS.items():
+        text = _first_text(card, selectors, f"carte.{field}")
+        if text:
+            raw[field] = text
+    for selector in CARD_LINK_SELECTORS:
+        links = [link.get("href") for link in _select(card, selector) if link.get("href")]
+        if links:
+            raw["url"] = urljoin(HOME_URL, links[0])
+            break
+    for selector in PRICE_SELECTORS:
+        for element in _select(card, selector):
+            text = inner_text(element)
+            if text:
+                raw["price_texts"].append(text)
+    return build_doctor_info(raw)
+
+def find_cards(document):
+    """Retourne les cartes du premier sélecteur de carte qui en trouve"""
+    for selector in selector_registry.order("cartes", CARD_SELECTORS):
+        cards = _select(document, selector)
+        if cards:
+            selector_registry.record("cartes", selector)
+            return cards
+    return []
+
+def parse_cards_html(page_source, max_results=None):
+    """Extrait toutes les cartes d'une page de résultats"""
+    cards = find_cards(lxml_html.fromstring(page_source))
+    if max_results:
+        cards = cards[:max_results]
+    return [parse_card(card) for card in cards]
+
+def parse_profile_html(page_source, fields=None):
+    """Extrait les champs d'une page de profil (équivalent de extract_profile_info)
+
+    fields limite l'extraction à certains champs (ex: name et availability).
+    """
+    document = lxml_html.fromstring(page_source)
+    fields = fields or PROFILE_FIELD_SELECTORS
+    doctor_info = {field: "Unknown" for field in fields}
+    for field in fields:
+        text = _first_text(document, PROFILE_FIELD_SELECTORS[field], f"profil.{field}")
+        if text:
+            doctor_info[field] = text
+
+    if doctor_info.get("address") == "Unknown":
+        for element in document.xpath(PROFILE_ADDRESS_FALLBACK_XPATH):
+            text = inner_text(element)
+            if text and any(s in text.lower() for s in PROFILE_ADDRESS_KEYWORDS):
+                doctor_info["address"] = text
+                break
+        selector_registry.record("profil.adresse_repli", PROFILE_ADDRESS_FALLBACK_XPATH
+                                 if doctor_info["address"] != "Unknown" else None)
+    return doctor_info
+
+def snapshot_page(driver, directory=None, filename="page.html"):
+    """Récupère page_source une seule fois et l'enregistre si un dossier est fourni"""
+    page_source = driver.page_source
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+            f.write(page_source)
+    return page_source
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def main():
+    parser = argparse.ArgumentParser(description="Ré-analyse des pages Doctolib enregistrées")
+    parser.add_argument("type", choices=["cartes", "profils"], help="Type de pages à analyser")
+    parser.add_argument("fichiers", nargs="+", help="Fichiers HTML enregistrés")
+    parser.add_argument("--output", type=str, default="resultats_hors_ligne.csv")
+    args = parser.parse_args()
+
+    if args.type == "cartes":
+        doctors = []
+        for path in args.fichiers:
+            doctors.extend(d for d in parse_cards_html(_read(path)) if d["Nom complet"] != "Non spécifié")
+        save_to_csv(doctors, args.output)
+    else:
+        doctors = [parse_profile_html(_read(path)) for path in args.fichiers]
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(PROFILE_FIELD_SELECTORS))
+            writer.writeheader()
+            writer.writerows(doctors)
+        print(f"✅ {len(doctors)} profils sauvegardés dans {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Moteur HTTP (sans navigateur) pour les pages de profil.
+
+Les pages sont téléchargées avec des sessions requests persistantes (keep-alive,
+une par thread) et une concurrence bornée, puis analysées avec html_engine.
+Une page qui ne contient pas le profil sans JavaScript est signalée (None) pour
+être reprise par le moteur Selenium.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from html_engine import parse_profile_html
+from instrumentation import instrumented
+from rate_limiter import rate_limiter
+
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.5",
+}
+
+_local = threading.local()
+
+def create_http_session(pool_size=10, retries=2):
+    """Session requests avec un pool de connexions persistantes et des relances sur erreurs 5xx"""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504),
+                  allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+def _thread_session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = create_http_session()
+    return session
+
+def needs_javascript(doctor_info):
+    """Vrai si la page reçue ne contient pas le profil (application rendue côté client)"""
+    return doctor_info["name"] == "Unknown"
+
+@instrumented("profil_http")
+def fetch_profile(url, timeout=15, cache=None, fields=None):
+    """Télécharge et analyse un profil; retourne None si la page exige JavaScript
+
+    Avec fields (qui doit comprendre name), seuls ces champs sont extraits et le
+    cache n'est pas utilisé. Avec un cache, les champs encore valides sont servis
+    tels quels et seuls les champs périmés sont extraits de la page.
+    """
+    cached = None
+    if fields is None and cache is not None:
+        cached, fields = cache.lookup(url)
+        if cached is not None and not fields:
+            return cached
+    elif fields is not None:
+        cache = None
+    with rate_limiter.slot(url) as request:
+        response = _thread_session().get(url, timeout=timeout)
+        request.status = response.status_code
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            request.retry_after = float(retry_after)
+        response.raise_for_status()
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        response.encoding = "utf-8"  # Doctolib sert ses pages en UTF-8
+    doctor_info = parse_profile_html(response.text, fields)
+    if needs_javascript(doctor_info):
+        return None
+    if cache is not None:
+        cache.put(url, doctor_info, response.text)
+    return doctor_info if cached is None else dict(cached, **doctor_info)
+
+def fetch_profiles(urls, concurrency=8, timeout=15, cache=None, on_result=None):
+    """Télécharge les profils en parallèle (au plus `concurrency` requêtes simultanées).
+
+    Retourne une liste alignée sur urls: le profil, ou None si la page doit être
+    reprise avec le navigateur (JavaScript requis ou erreur HTTP).
+    """
+    results = [None] * len(urls)
+    if not urls:
+        return results
+    start = time.perf_counter()
+
+    def fetch(index):
+        try:
+            results[index] = fetch_profile(urls[index], timeout, cache)
+        except requests.RequestException as e:
+            print(f"⚠️ Échec HTTP pour {urls[index]}: {e}")
+            return
+        if results[index] is not None and on_result is not None:
+            on_result(index, results[index])
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        list(executor.map(fetch, range(len(urls))))
+
+    elapsed = time.perf_counter() - start
+    fetched = sum(result is not None for result in results)
+    rate = fetched / elapsed * 60 if elapsed else 0
+    print(f"✓ HTTP: {fetched}/{len(urls)} profils en {elapsed:.2f} s ({rate:.0f} profils/min), "
+          f"{len(urls) - fetched} à reprendre avec le navigateur")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure du moteur HTTP sur les pages enregistrées")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=50, help="Nombre de passages sur les fixtures")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence simulée par requête (s)")
+    args = parser.parse_args()
+
+    # Le serveur des pages enregistrées ne sert qu'à la mesure, jamais au moteur lui-même
+    from fixture_server import serve_fixtures, list_fixture_urls
+    with serve_fixtures(latency=args.latency) as base_url:
+        urls = list_fixture_urls(base_url, "profiles") * args.repeat
+        results = fetch_profiles(urls, concurrency=args.concurrency)
+    for url, doctor_info in list(zip(urls, results))[:len(urls) // args.repeat]:
+        print(f"{url}: {doctor_info if doctor_info else 'JavaScript requis -> Selenium'}")
+
+if __name__ == "__main__":
+    main()
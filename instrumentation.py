@@ -0,0 +1,169 @@
+"""Mesure du temps passé dans chaque étape d'une exécution.
+
+    with stage("recherche"):
+        search_doctors(...)
+
+    @instrumented("profil")
+    def scrape_profile(...): ...
+
+Chaque passage dans une étape est chronométré (durées conservées pour les
+percentiles), les échecs (exceptions) sont comptés, et les appels WebDriver d'un
+navigateur instrumenté (instrument_driver) sont attribués à l'étape en cours du
+thread appelant. write_run_report() écrit le tout en JSON à côté du fichier de
+résultats: p50/p95 par étape et débit en médecins par minute.
+"""
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from waits import wait_stats
+
+# Étape à laquelle sont attribués les appels WebDriver faits hors de toute étape
+NO_STAGE = "hors_etape"
+
+# Statistiques par étape: {étape: {"durations": [...], "failures": n, "webdriver_calls": n, "webdriver_failures": n}}
+stage_stats = {}
+_stats_lock = threading.Lock()
+_local = threading.local()
+_run_start = time.perf_counter()
+
+def _stats(name):
+    stats = stage_stats.get(name)
+    if stats is None:
+        stats = stage_stats[name] = {"durations": [], "failures": 0, "webdriver_calls": 0, "webdriver_failures": 0}
+    return stats
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def current_stage():
+    """Étape la plus interne en cours dans ce thread"""
+    stack = _stack()
+    return stack[-1] if stack else NO_STAGE
+
+@contextmanager
+def stage(name):
+    """Chronomètre un passage dans une étape; une exception est comptée comme un échec puis propagée"""
+    stack = _stack()
+    stack.append(name)
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        with _stats_lock:
+            stats = _stats(name)
+            stats["durations"].append(elapsed)
+            if failed:
+                stats["failures"] += 1
+
+def instrumented(name):
+    """Décorateur: chaque appel de la fonction est un passage dans l'étape name"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def instrument_driver(driver):
+    """Compte les commandes WebDriver (et leurs échecs) par étape en enveloppant driver.execute"""
+    if getattr(driver, "_instrumented", False):
+        return driver
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        name = current_stage()
+        try:
+            return execute(driver_command, params)
+        except Exception:
+            with _stats_lock:
+                _stats(name)["webdriver_failures"] += 1
+            raise
+        finally:
+            with _stats_lock:
+                _stats(name)["webdriver_calls"] += 1
+
+    driver.execute = counted_execute
+    driver._instrumented = True
+    return driver
+
+def percentile(values, fraction):
+    """Percentile par rang le plus proche (values non vide)"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+def stage_summary():
+    """Résumé par étape: passages, durées totale/p50/p95/max, échecs et appels WebDriver"""
+    summary = {}
+    with _stats_lock:
+        items = [(name, dict(stats, durations=list(stats["durations"]))) for name, stats in stage_stats.items()]
+    for name, stats in items:
+        durations = stats["durations"]
+        summary[name] = {
+            "count": len(durations),
+            "total_s": round(sum(durations), 3),
+            "p50_s": round(percentile(durations, 0.50), 4) if durations else None,
+            "p95_s": round(percentile(durations, 0.95), 4) if durations else None,
+            "max_s": round(max(durations), 4) if durations else None,
+            "failures": stats["failures"],
+            "webdriver_calls": stats["webdriver_calls"],
+            "webdriver_failures": stats["webdriver_failures"],
+        }
+    return summary
+
+def default_report_path(output):
+    """Fichier du rapport d'exécution associé à un fichier de sortie"""
+    return f"{os.path.splitext(output)[0]}.report.json"
+
+def write_run_report(path, doctors, parameters=None):
+    """Écrit le rapport JSON de l'exécution (étapes, attentes, débit) et retourne son contenu"""
+    duration = time.perf_counter() - _run_start
+    report = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": parameters or {},
+        "duration_s": round(duration, 2),
+        "doctors": doctors,
+        "doctors_per_minute": round(doctors / duration * 60, 2) if duration else None,
+        "stages": stage_summary(),
+        "waits": {step: {"total_s": round(elapsed, 3), "count": count, "timeouts": timeouts}
+                  for step, (elapsed, count, timeouts) in wait_stats.items()},
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✓ Rapport d'exécution écrit dans {path}")
+    return report
+
+def print_stage_report():
+    """Affiche le temps passé dans chaque étape"""
+    summary = stage_summary()
+    if not summary:
+        return
+    print("\n=== Temps par étape ===")
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total_s"]):
+        timing = (f"p50 {stats['p50_s']:.3f} s, p95 {stats['p95_s']:.3f} s"
+                  if stats["count"] else "aucun passage")
+        print(f"{name:<20} {stats['total_s']:8.2f} s  ({stats['count']} passages, {timing}, "
+              f"{stats['webdriver_calls']} appels WebDriver, {stats['failures']} échecs)")
+
+def reset_instrumentation():
+    """Remet à zéro les statistiques et le début de l'exécution"""
+    global _run_start
+    with _stats_lock:
+        stage_stats.clear()
+    _run_start = time.perf_counter()
@@ -1,13 +1,18 @@
 import argparse
+import time
+from functools import partial
 from datetime import datetime
-from doctolib_scraper import (
-    setup_driver,
-    accept_cookies,
-    search_doctors,
-    scrape_doctors,
-    save_to_csv
-)
-from selenium.webdriver.support.ui import WebDriverWait
+from doctolib_scraper import EXTRACTION_ENGINES, NAVIGATION_METHODS, BROWSER_PROFILES, setup_driver
+from scraper_core import DEPTHS, DEPTH_CARDS, DEPTH_FIELDNAMES, scrape
+from scraping_a_doctor import PROFILE_ENGINES
+from profile_cache import ProfileCache
+from driver_pool import DriverPool
+from output_sinks import OUTPUT_FORMATS, open_resumable_sink
+from checkpoint import CARD, PROFILE, CheckpointStore, default_checkpoint_path
+from dedup_index import DedupIndex
+from instrumentation import default_report_path, write_run_report
+from doctolib_selectors import selector_registry
+from cli import add_dedup_argument, add_politeness_arguments, configure_politeness, print_run_reports
 
 def validate_date(date_str):
     try:
@@ -19,47 +24,78 @@ def main():
     parser = argparse.ArgumentParser(description="Scraper Doctolib")
     parser.add_argument("--specialite", type=str, required=True, help="Spécialité médicale")
     parser.add_argument("--lieu", type=str, required=True, help="Localisation")
-    parser.add_argument("--max_results", type=int, default=10, help="Nombre maximum de résultats")
+    parser.add_argument("--max_results", type=int, default=None, help="Nombre maximum de résultats (par défaut: tous)")
     parser.add_argument("--output", type=str, default="resultats_doctolib.csv")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None,
+                        help="Format de sortie (par défaut: d'après l'extension de --output)")
+    parser.add_argument("--engine", choices=EXTRACTION_ENGINES, default="webdriver",
+                        help="Moteur d'extraction des cartes (js: un seul appel navigateur, html: analyse hors ligne)")
+    parser.add_argument("--depth", choices=DEPTHS, default=DEPTH_CARDS,
+                        help="cartes: cartes de résultats seules, profils: visite aussi chaque page de profil")
+    parser.add_argument("--profile_engine", choices=PROFILE_ENGINES, default="webdriver",
+                        help="Moteur d'extraction des profils (profondeur profils)")
+    parser.add_argument("--http_concurrency", type=int, default=8,
+                        help="Requêtes HTTP simultanées (moteur de profils http)")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="Fichier SQLite du cache des profils (profondeur profils)")
+    parser.add_argument("--snapshot_dir", type=str, default=None,
+                        help="Dossier où enregistrer le HTML analysé (moteur html)")
+    parser.add_argument("--navigation", choices=NAVIGATION_METHODS, default="url",
+                        help="url: ouverture directe de la page de résultats, form: formulaire de recherche")
+    parser.add_argument("--browser_profile", choices=BROWSER_PROFILES, default="full",
+                        help="full: Chrome complet, lean: headless sans images, polices ni traceurs")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprendre une exécution interrompue (complète le CSV existant; Parquet et SQLite "
+                             "sont réécrits à partir du point de reprise)")
+    parser.add_argument("--checkpoint", type=str, default=None,
+                        help="Fichier de reprise (par défaut: <output>.checkpoint.sqlite, supprimé après une exécution complète)")
+    add_dedup_argument(parser)
+    add_politeness_arguments(parser)
     
     args = parser.parse_args()
+    configure_politeness(args)
     
-    driver = None
+    checkpoint = CheckpointStore(args.checkpoint or default_checkpoint_path(args.output), resume=args.resume)
+    dedup = DedupIndex(args.dedup_index)
+    selector_registry.load()
+    cache = ProfileCache(args.cache) if args.cache else None
+    pool = DriverPool(size=1, driver_factory=partial(setup_driver, profile=args.browser_profile))
+    doctors = 0
+    start_time = time.perf_counter()
     try:
-        driver = setup_driver()
-        wait = WebDriverWait(driver, 15)
-        
+        # La session du pool arrive sur la page d'accueil, cookies acceptés
         print("Accès à Doctolib...")
-        driver.get("https://www.doctolib.fr/")
-        accept_cookies(driver, wait)
-        
-        print(f"Recherche des médecins pour: {args.specialite} à {args.lieu}")
-        search_success = search_doctors(driver, wait, args.specialite, args.lieu)
+        # Chaque médecin est écrit dès son extraction (en reprise, après les fiches déjà obtenues)
+        kind = CARD if args.depth == DEPTH_CARDS else PROFILE
+        with open_resumable_sink(args.output, DEPTH_FIELDNAMES[args.depth], checkpoint, kind,
+                                 output_format=args.format, resume=args.resume) as sink:
+            replayed = sink.rows
+            scrape(args.specialite, args.lieu, args.depth, pool=pool, browser_profile=args.browser_profile,
+                   navigation=args.navigation, card_engine=args.engine, profile_engine=args.profile_engine,
+                   max_results=args.max_results, sink=sink, checkpoint=checkpoint, dedup=dedup, cache=cache,
+                   http_concurrency=args.http_concurrency, snapshot_dir=args.snapshot_dir)
+        # Exécution menée à son terme: le point de reprise est supprimé à la fermeture
+        checkpoint.complete()
+        doctors = sink.rows - replayed
         
-        if search_success:  # Continuer seulement si la recherche a réussi
-            print("Recherche terminée, extraction des données...")
-            doctors_data = scrape_doctors(driver, wait)
-            
-            if doctors_data and len(doctors_data) > 0:
-                print(f"\nSauvegarde de {len(doctors_data)} résultats dans {args.output}")
-                save_to_csv(doctors_data, args.output)
-                
-                import os
-                if os.path.exists(args.output):
-                    print(f"✅ Fichier CSV créé avec succès: {args.output}")
-                    print(f"   Nombre de médecins sauvegardés: {len(doctors_data)}")
-                else:
-                    print("❌ Erreur: Le fichier CSV n'a pas été créé")
-            else:
-                print("❌ Aucune donnée n'a été extraite.")
+        if sink.rows > 0 or checkpoint.count():
+            print(f"✅ Fichier créé avec succès: {args.output}")
+            print(f"   Nombre de médecins sauvegardés: {checkpoint.count()} ({doctors} nouveaux)")
         else:
-            print("❌ La recherche n'a pas donné de résultats.")
+            print("❌ Aucune donnée n'a été extraite.")
         
     except Exception as e:
         print(f"❌ Erreur critique: {e}")
     finally:
-        if driver:
-            driver.quit()
+        pool.close()
+        checkpoint.close()
+        print_run_reports(args.browser_profile, dedup=dedup, cache=cache)
+        dedup.close()
+        if cache:
+            cache.close()
+        selector_registry.save()
+        write_run_report(default_report_path(args.output), doctors, vars(args))
+        print(f"Durée totale: {time.perf_counter() - start_time:.1f} s")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
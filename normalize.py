@@ -0,0 +1,303 @@
+"""Normalisation des textes extraits en valeurs typées.
+
+Les cartes et les profils contiennent du texte libre ("Prochaine disponibilité
+le lundi 12 mai", "25 € à 50 €", "Conventionné secteur 2", "69437 LYON CEDEX 03");
+ces fonctions en tirent des valeurs exploitables: dates, fourchettes de prix en
+euros, secteur de conventionnement, code postal validé et ville.
+
+normalize_records() traite un lot entier colonne par colonne: chaque texte
+distinct n'est analysé qu'une fois (les analyses sont aussi mémorisées d'un lot
+à l'autre), ce qui coûte peu sur des milliers de cartes aux textes répétitifs.
+
+    python normalize.py pediatres_lyon.csv --output pediatres_lyon.parquet
+"""
+import argparse
+import csv
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+MONTHS = {
+    "janvier": 1, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6, "juillet": 7,
+    "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12,
+    "janv": 1, "fevr": 2, "avr": 4, "juil": 7, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+WEEKDAYS = {"lundi": 0, "mardi": 1, "mercredi": 2, "jeudi": 3, "vendredi": 4, "samedi": 5, "dimanche": 6}
+
+# Secteurs de conventionnement
+SECTEUR_1 = "Secteur 1"
+SECTEUR_2 = "Secteur 2"
+NON_CONVENTIONNE = "Non conventionné"
+SECTORS = (SECTEUR_1, SECTEUR_2, NON_CONVENTIONNE)
+
+# Types des colonnes normalisées
+STRING, PRICE, PRICE_MAX, DATETIME, POSTAL_CODE, CITY, SECTOR = (
+    "string", "price", "price_max", "datetime", "postal_code", "city", "sector")
+
+# Type des colonnes des cartes (doctolib_scraper) et des profils (scraping_a_doctor); les autres sont du texte
+COLUMN_TYPES = {
+    "Prochaine disponibilité": DATETIME,
+    "availability": DATETIME,
+    "Prix estimé": PRICE,
+    "tarif": PRICE,
+    "Secteur d'assurance": SECTOR,
+    "convention": SECTOR,
+    "Code postal": POSTAL_CODE,
+}
+
+# Colonnes ajoutées par la normalisation: colonne source -> [(nouvelle colonne, type)]
+DERIVED_COLUMNS = {
+    "Prix estimé": [("Prix maximum", PRICE_MAX)],
+    "tarif": [("tarif_max", PRICE_MAX)],
+    "address": [("postal_code", POSTAL_CODE), ("city", CITY)],
+}
+
+MISSING_VALUES = ("", "Non spécifié", "Unknown")
+
+_AMOUNT = r"(\d+(?:[.,]\d{1,2})?)"
+_EURO = r"\s*(?:€|euros?\b)"
+# "25 € - 50 €", "25 à 50 €", "Entre 25,50 et 40 €": les séparateurs en toutes lettres sont des mots entiers
+_RANGE_SEPARATOR = r"(?:-|–|(?<!\w)(?:à|a|et)(?!\w))"
+_PRICE_RANGE_RE = re.compile(rf"{_AMOUNT}(?:{_EURO})?\s*{_RANGE_SEPARATOR}\s*{_AMOUNT}{_EURO}")
+_PRICE_RE = re.compile(rf"{_AMOUNT}{_EURO}")
+_POSTAL_CODE_RE = re.compile(r"(?<!\d)(\d{5})(?!\d)")
+_POSTAL_LINE_RE = re.compile(r"(?<!\d)(\d{5})\s+(.+)$")
+_CEDEX_RE = re.compile(r"\s+cedex(?:\s+\d+)?\s*$", re.IGNORECASE)
+_NUMERIC_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_TEXT_DATE_RE = re.compile(r"(\d{1,2})(?:er)?\s+([a-z]+)\.?(?:\s+(\d{4}))?")
+_IN_DAYS_RE = re.compile(r"dans\s+(\d+)\s+jours?")
+# Heure du créneau: "09:30", "9h30", "16h", "16 heures" (pas les nombres d'une date)
+_TIME_RE = re.compile(r"(?<![\d/:])([01]?\d|2[0-3])\s*(?:h(?:eures?)?\s*([0-5]\d)?|:([0-5]\d))(?![\d:a-z])")
+
+def _fold(text):
+    """Minuscules sans accents, pour comparer des textes français"""
+    return unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+
+@lru_cache(maxsize=65536)
+def parse_price_range(text):
+    """Fourchette de prix en euros: "25 € à 50 €" ou "Entre 25 et 50 €" -> (25.0, 50.0), "30 €" -> (30.0, 30.0)"""
+    if not text:
+        return (None, None)
+    match = _PRICE_RANGE_RE.search(str(text))
+    if match:
+        low, high = sorted(float(amount.replace(",", ".")) for amount in match.groups())
+        return (low, high)
+    match = _PRICE_RE.search(str(text))
+    if match:
+        amount = float(match.group(1).replace(",", "."))
+        return (amount, amount)
+    return (None, None)
+
+def parse_price(text):
+    """Premier montant (ou bas de fourchette) en euros d'un texte, sinon None"""
+    return parse_price_range(text)[0]
+
+@lru_cache(maxsize=1024)
+def parse_sector(text):
+    """Secteur de conventionnement (SECTEUR_1, SECTEUR_2, NON_CONVENTIONNE), sinon None"""
+    if not text:
+        return None
+    folded = _fold(text)
+    if "non conventionne" in folded:
+        return NON_CONVENTIONNE
+    if re.search(r"secteur\s*2", folded):
+        return SECTEUR_2
+    if re.search(r"secteur\s*1", folded) or "conventionne" in folded:
+        return SECTEUR_1  # "Conventionné" sans secteur: tarifs de la Sécurité sociale
+    return None
+
+def is_valid_postal_code(code):
+    """Vrai pour un code postal français plausible (département 01 à 95, Corse 20, outre-mer 97/98)"""
+    if not code or len(code) != 5 or not code.isdigit():
+        return False
+    department = int(code[:2])
+    return 1 <= department <= 95 or department in (97, 98)
+
+@lru_cache(maxsize=65536)
+def parse_postal_code(text):
+    """Dernier code postal valide d'un texte (chaîne, zéro initial conservé), sinon None"""
+    if not text:
+        return None
+    for code in reversed(_POSTAL_CODE_RE.findall(str(text))):
+        if is_valid_postal_code(code):
+            return code
+    return None
+
+@lru_cache(maxsize=65536)
+def parse_address(text):
+    """Découpe une adresse en (rue, code postal, ville); les éléments absents valent None
+
+    Accepte les adresses sur plusieurs lignes ("Cabinet\\n12 rue X\\n69003 Lyon 3e"),
+    sur une ligne avec des virgules et les mentions CEDEX ("69437 LYON CEDEX 03" -> "LYON").
+    """
+    if not text:
+        return (None, None, None)
+    lines = [line.strip() for line in str(text).replace("\r", "\n").split("\n") if line.strip()]
+    if len(lines) == 1 and "," in lines[0]:
+        lines = [part.strip() for part in lines[0].split(",") if part.strip()]
+
+    for index in range(len(lines) - 1, -1, -1):
+        match = _POSTAL_LINE_RE.search(lines[index])
+        if match and is_valid_postal_code(match.group(1)):
+            before = lines[index][:match.start()].strip(" ,")
+            street_parts = lines[:index] + ([before] if before else [])
+            city = _CEDEX_RE.sub("", match.group(2)).strip(" ,") or None
+            return (", ".join(street_parts) or None, match.group(1), city)
+    return (lines[0] if lines else None, None, None)
+
+def parse_city(text):
+    return parse_address(text)[2]
+
+def parse_availability(text, today=None):
+    """Date (et heure si elle est donnée) de la prochaine disponibilité, sinon None
+
+    Comprend "aujourd'hui", "demain", "après-demain", "dans 3 jours", "lundi",
+    "lundi 12 mai", "12 mai 2025" et "03/04/2025", suivis ou non d'une heure
+    ("09:30", "9h30", "16h"). Sans année, la date est placée dans l'année en
+    cours, ou la suivante si elle est déjà passée; sans heure, à minuit.
+    """
+    if not text:
+        return None
+    today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    return _parse_availability(str(text), today)
+
+@lru_cache(maxsize=65536)
+def _parse_availability(text, today):
+    folded = _fold(text)
+    day = _parse_day(folded, today)
+    if day is None:
+        return None
+    match = _TIME_RE.search(folded)
+    if match:
+        return day.replace(hour=int(match.group(1)), minute=int(match.group(2) or match.group(3) or 0))
+    return day
+
+def _parse_day(folded, today):
+    if "aujourd" in folded:
+        return today
+    if "apres-demain" in folded or "apres demain" in folded:
+        return today + timedelta(days=2)
+    if "demain" in folded:
+        return today + timedelta(days=1)
+    match = _IN_DAYS_RE.search(folded)
+    if match:
+        return today + timedelta(days=int(match.group(1)))
+
+    match = _NUMERIC_DATE_RE.search(folded)
+    if match:
+        day, month, year = (int(group) for group in match.groups())
+        return _date_or_none(year, month, day)
+
+    for match in _TEXT_DATE_RE.finditer(folded):
+        month = MONTHS.get(match.group(2))
+        if month is None:
+            continue
+        day = int(match.group(1))
+        if match.group(3):
+            return _date_or_none(int(match.group(3)), month, day)
+        date = _date_or_none(today.year, month, day)
+        if date is not None and date < today:
+            date = _date_or_none(today.year + 1, month, day)
+        return date
+
+    # Jour de la semaine seul: sa prochaine occurrence (aujourd'hui compris)
+    for word in re.findall(r"[a-z]+", folded):
+        if word in WEEKDAYS:
+            return today + timedelta(days=(WEEKDAYS[word] - today.weekday()) % 7)
+    return None
+
+def _date_or_none(year, month, day):
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+_PARSERS = {
+    PRICE: parse_price,
+    PRICE_MAX: lambda text: parse_price_range(text)[1],
+    POSTAL_CODE: parse_postal_code,
+    CITY: parse_city,
+    SECTOR: parse_sector,
+}
+
+def column_type(field):
+    return COLUMN_TYPES.get(field, STRING)
+
+def normalized_fieldnames(fieldnames):
+    """Colonnes produites par normalize_records: les colonnes d'origine puis les colonnes dérivées"""
+    derived = [name for field in fieldnames for name, _ in DERIVED_COLUMNS.get(field, ())]
+    return list(fieldnames) + derived
+
+def normalized_column_types(fieldnames):
+    """Type de chaque colonne produite par normalize_records"""
+    types = {field: column_type(field) for field in fieldnames}
+    for field in fieldnames:
+        types.update(DERIVED_COLUMNS.get(field, ()))
+    return types
+
+def normalize_records(records, fieldnames, today=None):
+    """Normalise un lot d'enregistrements, colonne par colonne.
+
+    Retourne de nouveaux dictionnaires (colonnes de normalized_fieldnames) avec
+    None pour les valeurs absentes; chaque texte distinct d'une colonne n'est
+    analysé qu'une seule fois.
+    """
+    today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    columns = {}
+    for field in fieldnames:
+        raw = [record.get(field) for record in records]
+        raw = [None if value in MISSING_VALUES else value for value in raw]
+        columns[field] = _convert_column(raw, column_type(field), today)
+        for name, kind in DERIVED_COLUMNS.get(field, ()):
+            columns[name] = _convert_column(raw, kind, today)
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+def _convert_column(values, kind, today):
+    if kind == STRING:
+        return values
+    if kind == DATETIME:
+        parse = lambda text: _parse_availability(str(text), today)
+    else:
+        parse = _PARSERS[kind]
+    parsed = {value: parse(value) for value in set(values) if value is not None}
+    return [parsed.get(value) if value is not None else None for value in values]
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalise un CSV de résultats vers un format typé")
+    parser.add_argument("input", help="CSV produit par main.py, batch_main.py ou one_doctor_main.py")
+    parser.add_argument("--output", type=str, required=True, help="Fichier .parquet ou .sqlite (ou .csv)")
+    parser.add_argument("--batch_size", type=int, default=5000)
+    args = parser.parse_args()
+
+    from output_sinks import StreamingCsvWriter, open_sink, output_format_for
+    with open(args.input, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        if output_format_for(args.output) != "csv":
+            # Parquet et SQLite normalisent eux-mêmes chaque lot
+            with open_sink(args.output, reader.fieldnames, batch_size=args.batch_size) as sink:
+                sink.write_many(reader)
+            return
+        with StreamingCsvWriter(args.output, normalized_fieldnames(reader.fieldnames)) as sink:
+            batch = []
+            for record in reader:
+                batch.append(record)
+                if len(batch) >= args.batch_size:
+                    sink.write_many(_iso_dates(normalize_records(batch, reader.fieldnames)))
+                    batch = []
+            sink.write_many(_iso_dates(normalize_records(batch, reader.fieldnames)))
+
+def format_availability(value):
+    """Date ISO d'une disponibilité, avec l'heure si elle est connue ("2025-05-12 09:30")"""
+    if value.hour or value.minute:
+        return value.isoformat(sep=" ", timespec="minutes")
+    return value.date().isoformat()
+
+def _iso_dates(records):
+    for record in records:
+        yield {field: format_availability(value) if isinstance(value, datetime) else value
+               for field, value in record.items()}
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,37 @@
 import argparse
 import os
-import csv
 import time
-from scraping_a_doctor import scrape_doctolib
+from functools import partial
+from scraping_a_doctor import scrape_doctolib, setup_profile_driver, PROFILE_ENGINES
+from scraper_core import DEPTHS, DEPTH_PROFILES, DEPTH_FIELDNAMES, CARD_MISSING, PROFILE_MISSING
+from driver_pool import DriverPool
+from checkpoint import CheckpointStore, default_checkpoint_path
+from profile_cache import ProfileCache
+from dedup_index import DedupIndex
+from output_sinks import OUTPUT_FORMATS, OUTPUT_EXTENSIONS, open_sink
+from pipeline import scrape_doctolib_pipeline
+from doctolib_scraper import BROWSER_PROFILES, EXTRACTION_ENGINES
+from instrumentation import default_report_path, write_run_report
+from doctolib_selectors import selector_registry
+from cli import add_dedup_argument, add_politeness_arguments, configure_politeness, print_run_reports
 
 def print_doctor_info(doctor_info):
     """Affiche les informations d'un médecin"""
     print("\n" + "="*50)
     for key, value in doctor_info.items():
-        if value and value != "Unknown":
+        if value and value not in (PROFILE_MISSING, CARD_MISSING):
             print(f"{key}: {value}")
     print("="*50)
 
-def save_results(doctors, specialty, location):
-    """Sauvegarde les résultats dans un CSV"""
+def save_results(doctors, specialty, location, output_format="csv", depth=DEPTH_PROFILES):
+    """Sauvegarde les résultats (CSV, Parquet ou SQLite) avec les colonnes de la profondeur depth"""
     try:
         timestamp = time.strftime("%Y%m%d_%H%M%S")
-        filename = f"{specialty}_{location}_{timestamp}.csv"
+        filename = f"{specialty}_{location}_{timestamp}{OUTPUT_EXTENSIONS[output_format]}"
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            fields = ["name", "specialty", "address", "availability", "tarif", "convention"]
-            writer = csv.DictWriter(f, fieldnames=fields)
-            writer.writeheader()
+        with open_sink(filename, DEPTH_FIELDNAMES[depth], output_format) as sink:
             for doc in doctors:
-                writer.writerow({k: v for k, v in doc.items() if v != "Unknown"})
+                sink.write({k: v for k, v in doc.as_row(depth).items() if v != PROFILE_MISSING})
         print(f"\n✓ Résultats sauvegardés dans {filename}")
         return filename
     except Exception as e:
@@ -36,16 +44,82 @@ def main():
                       help="Spécialité du médecin (ex: pediatre)")
     parser.add_argument("--location", type=str, required=True,
                       help="Ville ou code postal (ex: lyon)")
+    parser.add_argument("--max_results", type=int, default=None,
+                      help="Nombre maximum de profils (par défaut: toutes les pages de résultats)")
+    parser.add_argument("--depth", choices=DEPTHS, default=DEPTH_PROFILES,
+                      help="profils: visite chaque page de profil, cartes: cartes de résultats seules (plus rapide)")
+    parser.add_argument("--card_engine", choices=EXTRACTION_ENGINES, default="js",
+                      help="Moteur d'extraction des cartes de résultats")
+    parser.add_argument("--engine", choices=PROFILE_ENGINES, default="webdriver",
+                      help="Moteur d'extraction des profils (html: analyse hors ligne de page_source, "
+                           "http: sans navigateur, repli sur Selenium si JavaScript est requis)")
+    parser.add_argument("--http_concurrency", type=int, default=8,
+                      help="Nombre maximum de requêtes HTTP simultanées (moteur http)")
+    parser.add_argument("--snapshot_dir", type=str, default=None,
+                      help="Dossier où enregistrer le HTML des profils (moteur html)")
+    parser.add_argument("--workers", type=int, default=1,
+                      help="Nombre de navigateurs headless pour visiter les profils en parallèle")
+    parser.add_argument("--browser_profile", choices=BROWSER_PROFILES, default="full",
+                      help="full: Chrome complet, lean: headless sans images, polices ni traceurs")
+    parser.add_argument("--resume", action="store_true",
+                      help="Reprendre une exécution interrompue sans refaire la recherche ni les profils déjà visités")
+    parser.add_argument("--checkpoint", type=str, default=None,
+                      help="Fichier de reprise (par défaut: <specialite>_<location>.checkpoint.sqlite, "
+                           "supprimé après une exécution complète)")
+    add_dedup_argument(parser)
+    parser.add_argument("--cache", type=str, default=None,
+                      help="Fichier SQLite du cache des profils (désactivé par défaut)")
+    parser.add_argument("--cache_max_entries", type=int, default=50000,
+                      help="Nombre maximum de profils gardés en cache (éviction LRU)")
+    parser.add_argument("--cache_html", action="store_true",
+                      help="Conserver aussi le HTML brut des profils dans le cache")
+    parser.add_argument("--pipeline", action="store_true",
+                      help="Étapes en recouvrement: les profils sont visités et écrits dès que leurs liens sont trouvés")
+    parser.add_argument("--output", type=str, default=None,
+                      help="Fichier écrit au fil de l'eau en mode --pipeline")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None,
+                      help="Format de sortie: csv, parquet (pyarrow) ou sqlite "
+                           "(par défaut: d'après l'extension de --output, sinon csv)")
+    add_politeness_arguments(parser, timeouts_example="profil=5,page=20")
     
     args = parser.parse_args()
+    if args.pipeline and args.depth != DEPTH_PROFILES:
+        parser.error("--pipeline ne s'applique qu'à la profondeur profils")
+    configure_politeness(args)
     
     print("\n=== Doctolib Scraper ===")
     print(f"Recherche de {args.specialite} à {args.location}")
     
+    # Le rapport d'exécution et le point de reprise sont écrits à côté du fichier de résultats
+    output = args.output or f"{args.specialite}_{args.location}.csv"
+    # Toujours écrit, pour qu'un arrêt imprévu puisse être repris; supprimé après une exécution complète
+    checkpoint = CheckpointStore(args.checkpoint or default_checkpoint_path(output), resume=args.resume)
+    dedup = DedupIndex(args.dedup_index)
+    selector_registry.load()
+    cache = ProfileCache(args.cache, max_entries=args.cache_max_entries,
+                         store_html=args.cache_html) if args.cache else None
+    pool = DriverPool(size=1, driver_factory=partial(setup_profile_driver, profile=args.browser_profile))
+    results = []
     try:
-        results = scrape_doctolib({
+        scrape = scrape_doctolib_pipeline if args.pipeline else scrape_doctolib
+        results = scrape({
             "query": args.specialite,
             "location": args.location,
+            "max_results": args.max_results,
+            "depth": args.depth,
+            "card_engine": args.card_engine,
+            "engine": args.engine,
+            "snapshot_dir": args.snapshot_dir,
+            "workers": args.workers,
+            "http_concurrency": args.http_concurrency,
+            "driver_pool": pool,
+            "browser_profile": args.browser_profile,
+            "checkpoint": checkpoint,
+            "dedup": dedup,
+            "cache": cache,
+            "resume": args.resume,
+            "output": args.output,
+            "output_format": args.format,
             "verbose": True  # Active l'affichage détaillé
         })
         
@@ -53,14 +127,25 @@ def main():
             print("\n=== Résultats trouvés ===")
             for i, doctor in enumerate(results, 1):
                 print(f"\nMédecin {i}/{len(results)}")
-                print_doctor_info(doctor)
+                print_doctor_info(doctor.as_row(args.depth))
             
-            save_results(results, args.specialite, args.location)
+            if not args.pipeline:  # le pipeline a déjà écrit son CSV au fil de l'eau
+                output = save_results(results, args.specialite, args.location, args.format or "csv",
+                                      args.depth) or output
         else:
             print("\n❌ Aucun résultat")
             
     except Exception as e:
         print(f"\n❌ Erreur critique: {e}")
+    finally:
+        pool.close()
+        checkpoint.close()
+        print_run_reports(args.browser_profile, dedup=dedup, cache=cache)
+        dedup.close()
+        if cache:
+            cache.close()
+        selector_registry.save()
+        write_run_report(default_report_path(output), len(results), vars(args))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,313 @@
+"""Écriture incrémentale des résultats, en CSV, Parquet ou SQLite.
+
+Chaque médecin est écrit dès son extraction. En CSV il est aussi vidé sur disque
+aussitôt: un arrêt brutal laisse un fichier valide contenant tout ce qui a été
+extrait jusque-là. Parquet et SQLite écrivent par lots, chaque lot passant
+par normalize_records (schéma typé: code postal validé en texte, prix et
+fourchettes en euros, secteur, disponibilité en date).
+Un enregistrement est un dictionnaire ou tout objet qui lit ses colonnes avec
+get(colonne), comme scraper_core.DoctorRecord: il est écrit sans conversion.
+
+    with open_sink("pediatres_lyon.parquet") as sink:
+        scrape_doctors(driver, wait, sink=sink)
+"""
+import csv
+import io
+import os
+import re
+import sqlite3
+import threading
+from doctolib_scraper import CSV_FIELDNAMES
+from normalize import (
+    STRING, PRICE, PRICE_MAX, DATETIME, POSTAL_CODE, CITY, SECTOR,
+    normalize_records,
+    normalized_fieldnames,
+    normalized_column_types
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # le format Parquet est indisponible sans pyarrow
+    pa = pq = None
+
+OUTPUT_FORMATS = ("csv", "parquet", "sqlite")
+OUTPUT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "sqlite": ".sqlite"}
+
+# Délimiteurs qui comptent pour retrouver la fin d'un enregistrement CSV
+_QUOTE_OR_NEWLINE_RE = re.compile(rb'["\n]')
+
+
+class StreamingCsvWriter:
+    """Écrit un CSV ligne par ligne, avec rotation et finalisation atomiques.
+
+    - chaque ligne est formatée en mémoire puis écrite en un seul appel et vidée;
+    - rotate() renomme (os.replace) le segment courant en <nom>.<n>.csv et repart
+      sur un fichier neuf, automatiquement tous les max_rows enregistrements;
+    - finalize() force l'écriture sur disque (fsync) et ferme le fichier.
+
+    write() peut être appelé depuis plusieurs threads.
+    """
+
+    def __init__(self, filename, fieldnames=CSV_FIELDNAMES, max_rows=None, append=False,
+                 fsync_every=0, encoding="utf-8"):
+        self.filename = filename
+        self.fieldnames = list(fieldnames)
+        self.max_rows = max_rows
+        self.fsync_every = fsync_every
+        self.encoding = encoding
+        self.rows = 0
+        self.segment_rows = 0
+        self.segments = []
+        self._file = None
+        self._lock = threading.Lock()
+        self._open(append)
+
+    def _open(self, append):
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(directory, exist_ok=True)
+        if append and os.path.exists(self.filename):
+            _truncate_partial_line(self.filename)
+        if append and os.path.exists(self.filename) and os.path.getsize(self.filename) > 0:
+            self._file = open(self.filename, "a", newline="", encoding=self.encoding)
+        else:
+            self._file = open(self.filename, "w", newline="", encoding=self.encoding)
+            self._write_line(self.fieldnames)
+            self._file.flush()
+
+    def _write_line(self, values):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        self._file.write(buffer.getvalue())
+
+    def write(self, record):
+        """Ajoute un enregistrement (dict ou DoctorRecord) et le vide immédiatement sur disque"""
+        values = [_cell(record.get(field, "")) for field in self.fieldnames]
+        with self._lock:
+            self._write_line(values)
+            self._file.flush()
+            self.rows += 1
+            self.segment_rows += 1
+            if self.fsync_every and self.rows % self.fsync_every == 0:
+                os.fsync(self._file.fileno())
+            if self.max_rows and self.segment_rows >= self.max_rows:
+                self._rotate()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def rotate(self):
+        """Clôt le segment courant sous un nom numéroté et recommence un fichier vide"""
+        with self._lock:
+            return self._rotate()
+
+    def _rotate(self):
+        self._close()
+        base, ext = os.path.splitext(self.filename)
+        rotated = f"{base}.{len(self.segments) + 1:03d}{ext or '.csv'}"
+        os.replace(self.filename, rotated)
+        self.segments.append(rotated)
+        self.segment_rows = 0
+        self._open(append=False)
+        return rotated
+
+    def _close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def finalize(self):
+        """Écrit tout sur disque et ferme le fichier; retourne le nombre d'enregistrements"""
+        with self._lock:
+            self._close()
+        print(f"✅ {self.rows} médecins sauvegardés dans {self.filename}")
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finalize()
+
+class _BatchWriter:
+    """Base des écritures typées par lots: write() accumule, _flush() normalise et écrit le lot"""
+
+    def __init__(self, filename, fieldnames, batch_size):
+        self.filename = filename
+        self.source_fieldnames = list(fieldnames)
+        self.fieldnames = normalized_fieldnames(fieldnames)
+        self.column_types = normalized_column_types(fieldnames)
+        self.batch_size = batch_size
+        self.rows = 0
+        self._batch = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, record):
+        """Ajoute un enregistrement (dict ou DoctorRecord); le lot est écrit quand il est plein"""
+        with self._lock:
+            self._batch.append(record)
+            self.rows += 1
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+                self._batch = []
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _flush(self):
+        self._write_rows(normalize_records(self._batch, self.source_fieldnames))
+
+    def finalize(self):
+        """Écrit le dernier lot et ferme le fichier; retourne le nombre d'enregistrements"""
+        with self._lock:
+            if self._batch:
+                self._flush()
+                self._batch = []
+            self._close()
+        print(f"✅ {self.rows} médecins sauvegardés dans {self.filename}")
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finalize()
+
+class ParquetWriter(_BatchWriter):
+    """Écrit un fichier Parquet, un groupe de lignes par lot de batch_size enregistrements.
+
+    Le fichier est écrit sous un nom temporaire puis renommé par finalize(): un
+    fichier existant n'est jamais laissé à moitié écrit. Avec append=True, ses
+    lignes sont recopiées en tête du nouveau fichier.
+    """
+
+    def __init__(self, filename, fieldnames=CSV_FIELDNAMES, batch_size=1000, append=False):
+        if pa is None:
+            raise ImportError("Le format Parquet nécessite pyarrow (pip install pyarrow)")
+        super().__init__(filename, fieldnames, batch_size)
+        arrow_types = {STRING: pa.string(), POSTAL_CODE: pa.string(), CITY: pa.string(), SECTOR: pa.string(),
+                       PRICE: pa.float64(), PRICE_MAX: pa.float64(), DATETIME: pa.timestamp("s")}
+        self.schema = pa.schema([(field, arrow_types[self.column_types[field]]) for field in self.fieldnames])
+        self._temporary = f"{filename}.tmp"
+        self._writer = pq.ParquetWriter(self._temporary, self.schema)
+        if append and os.path.exists(filename):
+            previous = pq.read_table(filename).select(self.fieldnames).cast(self.schema)
+            self._writer.write_table(previous)
+            self.rows += previous.num_rows
+
+    def _write_rows(self, rows):
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self._temporary, self.filename)
+
+class SqliteWriter(_BatchWriter):
+    """Écrit dans une table SQLite, un INSERT groupé (executemany) par lot.
+
+    Les dates sont enregistrées au format ISO 8601. Sans append, la table est vidée.
+    """
+
+    SQL_TYPES = {STRING: "TEXT", POSTAL_CODE: "TEXT", CITY: "TEXT", SECTOR: "TEXT",
+                 PRICE: "REAL", PRICE_MAX: "REAL", DATETIME: "TIMESTAMP"}
+
+    def __init__(self, filename, fieldnames=CSV_FIELDNAMES, batch_size=500, append=False, table="medecins"):
+        super().__init__(filename, fieldnames, batch_size)
+        self.table = table
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f"{_quote(field)} {self.SQL_TYPES[self.column_types[field]]}"
+                            for field in self.fieldnames)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({columns})")
+        if not append:
+            self._conn.execute(f"DELETE FROM {_quote(table)}")
+        self._conn.commit()
+        self._insert = (f"INSERT INTO {_quote(table)} ({', '.join(_quote(f) for f in self.fieldnames)}) "
+                        f"VALUES ({', '.join('?' for _ in self.fieldnames)})")
+
+    def _write_rows(self, rows):
+        values = [[_sql_value(row[field]) for field in self.fieldnames] for row in rows]
+        with self._conn:
+            self._conn.executemany(self._insert, values)
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+def output_format_for(filename):
+    """Format de sortie déduit de l'extension du fichier (CSV par défaut)"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    if ext in (".sqlite", ".sqlite3", ".db"):
+        return "sqlite"
+    return "csv"
+
+def open_sink(filename, fieldnames=CSV_FIELDNAMES, output_format=None, append=False, **options):
+    """Ouvre l'écriture des résultats dans le format demandé (ou celui de l'extension)"""
+    output_format = output_format or output_format_for(filename)
+    if output_format == "csv":
+        return StreamingCsvWriter(filename, fieldnames, append=append, **options)
+    if output_format == "parquet":
+        return ParquetWriter(filename, fieldnames, append=append, **options)
+    if output_format == "sqlite":
+        return SqliteWriter(filename, fieldnames, append=append, **options)
+    raise ValueError(f"Format de sortie inconnu: {output_format}")
+
+def open_resumable_sink(filename, fieldnames, checkpoint, kind, output_format=None, resume=False, **options):
+    """Ouvre la sortie d'une exécution avec point de reprise (checkpoint, travaux de type kind)
+
+    Seul un CSV existant est complété tel quel: chaque ligne y est vidée sur disque
+    avant d'être marquée dans le point de reprise. Parquet et SQLite écrivent par
+    lots (et Parquet ne renomme son fichier qu'à la fin): après un arrêt brutal,
+    le dernier lot est perdu alors que ses médecins sont déjà marqués. Ces formats
+    repartent donc d'un fichier neuf, où sont d'abord recopiées les fiches du point
+    de reprise.
+    """
+    output_format = output_format or output_format_for(filename)
+    append = resume and output_format == "csv" and os.path.exists(filename)
+    sink = open_sink(filename, fieldnames, output_format, append=append, **options)
+    if not append and checkpoint is not None:
+        sink.write_many(checkpoint.payloads(kind))
+    return sink
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def _sql_value(value):
+    return value.isoformat(sep=" ") if hasattr(value, "isoformat") else value
+
+def _cell(value):
+    return "" if value is None else value
+
+def _truncate_partial_line(filename, chunk_size=1 << 20):
+    """Supprime un dernier enregistrement incomplet (écriture interrompue) avant de reprendre
+
+    Un champ entre guillemets peut contenir des retours à la ligne (adresse des
+    profils): la fin du dernier enregistrement complet est le dernier saut de
+    ligne rencontré hors guillemets, et non le dernier saut de ligne du fichier.
+    """
+    quoted = False
+    end = 0
+    position = 0
+    with open(filename, "rb+") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            for match in _QUOTE_OR_NEWLINE_RE.finditer(chunk):
+                if match.group() == b'"':
+                    quoted = not quoted  # un guillemet doublé ("") bascule deux fois
+                elif not quoted:
+                    end = position + match.end()
+            position += len(chunk)
+        if end < position:
+            f.truncate(end)
@@ -0,0 +1,194 @@
+"""Pipeline asynchrone producteur/consommateur pour scrape_doctolib.
+
+Au lieu de phases successives (tous les liens, puis tous les profils, puis le CSV):
+
+    page de résultats --liens--> profils (HTTP) --fiches--> écriture CSV
+                                     \\--JavaScript requis--> navigateur
+
+les étapes communiquent par des asyncio.Queue bornées: un lien trouvé est
+immédiatement visité et chaque fiche est écrite dès qu'elle est prête. Une file
+pleine bloque l'étape précédente (contre-pression), ce qui borne la mémoire.
+Les cartes viennent du moteur commun (scraper_core.stream_cards): même
+recherche, mêmes sélecteurs et mêmes moteurs de cartes que scrape_doctolib.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from checkpoint import PROFILE
+from doctolib_scraper import slugify
+from http_engine import fetch_profile
+from output_sinks import OUTPUT_EXTENSIONS, open_resumable_sink
+from scraping_a_doctor import PROFILE_FIELDNAMES, scrape_profile
+from scraper_core import DoctorRecord, browser_session, stream_cards
+
+class _WriterFailed(BaseException):
+    """Arrête la lecture des cartes après l'échec de l'écriture.
+
+    Dérive de BaseException pour traverser les except Exception de scrape_doctors,
+    qui poursuivrait sinon le parcours des pages.
+    """
+
+async def _run_pipeline(session, specialty, location, sink, params, records):
+    """Exécute les trois étapes; records reçoit chaque fiche écrite, même si la lecture des cartes échoue"""
+    loop = asyncio.get_running_loop()
+    workers = params.get("http_concurrency", 8)
+    queue_size = params.get("queue_size", 2 * workers)
+    checkpoint = params.get("checkpoint")
+    dedup = params.get("dedup")
+    cache = params.get("cache")
+    snapshot_dir = params.get("snapshot_dir")
+
+    card_queue = asyncio.Queue(maxsize=queue_size)
+    record_queue = asyncio.Queue(maxsize=queue_size)
+    fallback_cards = []
+    start = time.perf_counter()
+    first_record = [None]
+    stopped = threading.Event()
+
+    # Étape 1: les pages de résultats, dans le thread du navigateur
+    def produce():
+        seen = set()
+
+        def on_card(card):
+            if stopped.is_set():
+                raise _WriterFailed()
+            if not card.url or card.url in seen:
+                return
+            if checkpoint is not None and checkpoint.is_done(PROFILE, card.url):
+                return
+            if dedup is not None and dedup.seen({}, card.url):
+                return
+            seen.add(card.url)
+            # Bloque le navigateur tant que la file des cartes est pleine
+            asyncio.run_coroutine_threadsafe(card_queue.put(card), loop).result()
+
+        try:
+            stream_cards(session, specialty, location, on_card, params.get("navigation", "url"),
+                         params.get("card_engine", "js"), params.get("max_results"), params.get("max_pages"),
+                         snapshot_dir)
+        except _WriterFailed:
+            print("❌ Écriture interrompue: arrêt de la lecture des cartes")
+
+    # Étape 2: les profils, téléchargés sans navigateur
+    async def profile_worker():
+        while True:
+            card = await card_queue.get()
+            if card is None:
+                return
+            try:
+                doctor_info = await asyncio.to_thread(fetch_profile, card.url, 15, cache)
+            except Exception as e:
+                print(f"⚠️ Échec HTTP pour {card.url}: {e}")
+                doctor_info = None
+            if doctor_info is None:
+                fallback_cards.append(card)
+            else:
+                await record_queue.put((card, doctor_info))
+
+    # Étape 3: l'écriture, fiche par fiche (comme les profils de scraper_core)
+    async def writer():
+        while True:
+            item = await record_queue.get()
+            if item is None:
+                return
+            card, doctor_info = item
+            record = card.add_profile(doctor_info)
+            row = record.as_profile_row()
+            sink.write(record)
+            if checkpoint is not None:
+                checkpoint.mark_done(PROFILE, card.url, row)
+            if dedup is not None:
+                dedup.add(row)
+            records.append(record)
+            if first_record[0] is None:
+                first_record[0] = time.perf_counter() - start
+                print(f"✓ Première fiche écrite après {first_record[0]:.2f} s")
+
+    writer_task = asyncio.create_task(writer())
+    worker_tasks = [asyncio.create_task(profile_worker()) for _ in range(workers)]
+
+    def writer_done(task):
+        # Sans écriture, les files pleines bloqueraient les profils et le navigateur: tout est arrêté
+        if task.cancelled() or task.exception() is None:
+            return
+        stopped.set()
+        for worker in worker_tasks:
+            worker.cancel()
+        for queue in (card_queue, record_queue):
+            while not queue.empty():
+                queue.get_nowait()
+
+    writer_task.add_done_callback(writer_done)
+    try:
+        await asyncio.to_thread(produce)
+    finally:
+        # Même si la lecture des cartes a échoué, les cartes déjà trouvées sont menées au bout
+        for _ in worker_tasks:
+            if stopped.is_set():
+                break
+            await card_queue.put(None)
+        await asyncio.gather(*worker_tasks, return_exceptions=True)
+
+        # Les pages qui exigent JavaScript passent par le navigateur, libéré par l'étape 1
+        for i, card in enumerate(fallback_cards):
+            if stopped.is_set():
+                break
+            try:
+                doctor_info = await asyncio.to_thread(scrape_profile, session.driver, card.url, "html",
+                                                      snapshot_dir, i, cache)
+                await record_queue.put((card, doctor_info))
+            except Exception as e:
+                print(f"⚠️ Erreur pour le profil {card.url}: {e}")
+
+        if not stopped.is_set():
+            await record_queue.put(None)
+        await asyncio.wait([writer_task])
+
+        elapsed = time.perf_counter() - start
+        rate = len(records) / elapsed * 60 if elapsed else 0
+        print(f"✓ Pipeline: {len(records)} fiches en {elapsed:.1f} s ({rate:.1f} fiches/min), "
+              f"{len(fallback_cards)} via le navigateur")
+        # Un échec de l'écriture remonte à l'appelant
+        writer_task.result()
+    return records
+
+def scrape_doctolib_pipeline(params):
+    """Même résultat que scrape_doctolib (liste de DoctorRecord), avec les étapes en recouvrement.
+
+    params accepte les clés de scrape_doctolib (query, location, max_results, max_pages,
+    card_engine, navigation, driver_pool, browser_profile, checkpoint, dedup, cache,
+    http_concurrency, snapshot_dir, output_format) ainsi que output (fichier de sortie, par défaut
+    <specialite>_<lieu>_<date>.csv), resume (compléter ce fichier s'il existe) et queue_size.
+    """
+    specialty = slugify(params.get("query", "medecin-generaliste"))
+    location = slugify(params.get("location", "75008"))
+    output_format = params.get("output_format")
+    extension = OUTPUT_EXTENSIONS[output_format or "csv"]
+    output = params.get("output") or f"{specialty}_{location}_{time.strftime('%Y%m%d_%H%M%S')}{extension}"
+    checkpoint = params.get("checkpoint")
+
+    # En reprise, on complète le même fichier ou on recopie les fiches déjà obtenues
+    sink = open_resumable_sink(output, PROFILE_FIELDNAMES, checkpoint, PROFILE, output_format,
+                               resume=bool(params.get("resume")))
+    previous = checkpoint.payloads(PROFILE) if checkpoint is not None else []
+
+    workers = params.get("http_concurrency", 8)
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=workers + 2))
+    records = []
+    completed = False
+    try:
+        with browser_session(params.get("driver_pool"), params.get("browser_profile", "full")) as session:
+            loop.run_until_complete(_run_pipeline(session, specialty, location, sink, params, records))
+        completed = True
+    except Exception as e:
+        print("Error occurred during the scraping process:")
+        print(e)
+    finally:
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+        sink.finalize()
+    if completed and checkpoint is not None:
+        checkpoint.complete()
+    return [DoctorRecord.from_profile(row) for row in previous] + records
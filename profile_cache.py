@@ -0,0 +1,147 @@
+"""Cache disque des pages de profil, indexé par URL.
+
+Chaque champ a sa propre durée de validité: la disponibilité expire vite,
+l'adresse lentement. Les champs encore valides sont servis depuis le cache;
+seuls les champs périmés sont extraits de nouveau (avec name, qui confirme que
+la page est rendue) puis fusionnés dans l'entrée, chacun avec sa propre date.
+Le cache est borné en nombre d'entrées et en taille, les entrées les moins
+récemment utilisées sont évincées.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Durée de validité (secondes) de chaque champ d'un profil
+FIELD_TTLS = {
+    "name": 30 * DAY,
+    "specialty": 30 * DAY,
+    "address": 30 * DAY,
+    "availability": 6 * HOUR,
+    "tarif": 7 * DAY,
+    "convention": 7 * DAY,
+}
+DEFAULT_TTL = DAY
+
+class ProfileCache:
+    """Cache LRU des profils (dictionnaires et, en option, HTML brut)"""
+
+    def __init__(self, path, max_entries=50000, max_bytes=512 * 1024 * 1024, field_ttls=None,
+                 store_html=False):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.field_ttls = dict(FIELD_TTLS, **(field_ttls or {}))
+        self.store_html = store_html
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "url TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at TEXT NOT NULL, "
+            "html TEXT, size INTEGER NOT NULL, last_access REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS profiles_lru ON profiles (last_access)")
+        self._conn.commit()
+
+    def _stale_fields(self, data, fetched_at, now):
+        return [field for field in data
+                if now - fetched_at.get(field, 0) > self.field_ttls.get(field, DEFAULT_TTL)]
+
+    def lookup(self, url):
+        """Retourne (profil en cache, champs à extraire de nouveau).
+
+        (None, None) si l'URL est absente, (profil, []) si tous ses champs sont
+        valides; sinon la liste des champs périmés, précédée de name.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, fetched_at FROM profiles WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, None
+            data, fetched_at = json.loads(row[0]), json.loads(row[1])
+            self._conn.execute("UPDATE profiles SET last_access = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+            stale = self._stale_fields(data, fetched_at, now)
+            if not stale:
+                self.hits += 1
+                return data, []
+            self.stale += 1
+            return data, ["name"] + [field for field in stale if field != "name"]
+
+    def get(self, url):
+        """Retourne le profil en cache si tous ses champs sont encore valides, sinon None"""
+        data, fields = self.lookup(url)
+        return data if data is not None and not fields else None
+
+    def get_html(self, url):
+        """HTML brut enregistré pour une URL (si store_html était actif)"""
+        with self._lock:
+            row = self._conn.execute("SELECT html FROM profiles WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, url, data, html=None):
+        """Enregistre les champs fraîchement extraits, fusionnés avec l'entrée existante.
+
+        Seuls les champs de data voient leur date d'extraction renouvelée; évince
+        ensuite si le cache est plein.
+        """
+        now = time.time()
+        html = html if self.store_html else None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, fetched_at, html FROM profiles WHERE url = ?", (url,)).fetchone()
+            merged, fetched_at = ({}, {}) if row is None else (json.loads(row[0]), json.loads(row[1]))
+            merged.update(data)
+            fetched_at.update({field: now for field in data})
+            if html is None and row is not None:
+                html = row[2]
+            payload = json.dumps(merged, ensure_ascii=False)
+            size = len(payload) + (len(html) if html else 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (url, data, fetched_at, html, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, payload, json.dumps(fetched_at), html, size, now))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM profiles").fetchone()
+        while (self.max_entries and count > self.max_entries) or (self.max_bytes and total > self.max_bytes):
+            excess = max(count - self.max_entries, 1) if self.max_entries else 1
+            victims = self._conn.execute(
+                "SELECT url, size FROM profiles ORDER BY last_access LIMIT ?", (excess,)).fetchall()
+            if not victims:
+                break
+            self._conn.executemany("DELETE FROM profiles WHERE url = ?", [(url,) for url, _ in victims])
+            count -= len(victims)
+            total -= sum(size for _, size in victims)
+            self.evictions += len(victims)
+
+    def report(self):
+        """Affiche les taux de succès du cache pour l'exécution"""
+        lookups = self.hits + self.misses + self.stale
+        if not lookups:
+            return
+        rate = self.hits / lookups * 100
+        print(f"\n=== Cache des profils ({self.path}) ===")
+        print(f"{self.hits} succès, {self.stale} entrées en partie périmées, {self.misses} absentes "
+              f"sur {lookups} consultations ({rate:.0f}% de succès), {self.evictions} évictions")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
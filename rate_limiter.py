@@ -0,0 +1,221 @@
+"""Cadence des requêtes vers Doctolib: seau à jetons adaptatif par hôte.
+
+Chaque hôte a son budget:
+
+    - un seau de `burst` jetons rechargé à `rate` requêtes/s (rafales permises
+      tant qu'il reste des jetons, puis une requête tous les 1/rate s);
+    - au plus `max_concurrency` requêtes simultanées, quel que soit le nombre
+      de threads ou de navigateurs.
+
+Le débit s'adapte (AIMD): il augmente un peu après chaque réponse rapide, est
+réduit quand la latence dépasse nettement sa moyenne (slow_factor fois et
+min_slowdown secondes de plus), divisé par deux sur erreur, et l'hôte est mis
+en pause après une réponse 429/503 (Retry-After si connu). Les attentes sont légèrement aléatoires pour ne pas envoyer les
+requêtes des différents workers au même instant.
+
+    polite_get(driver, url)            # remplace driver.get(url)
+    with rate_limiter.slot(url) as request:
+        response = session.get(url)
+        request.status = response.status_code
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from browser_metrics import count_page_load
+
+# Statuts HTTP qui signalent que l'on va trop vite
+THROTTLE_STATUSES = (429, 503)
+
+# Statut HTTP de la navigation courante (Chrome 109+), None s'il est inconnu
+_NAVIGATION_STATUS_JS = """
+var entry = performance.getEntriesByType('navigation')[0];
+return entry && entry.responseStatus ? entry.responseStatus : null;
+"""
+
+class Request:
+    """Une requête en cours; l'appelant renseigne status (et retry_after) s'il les connaît"""
+
+    def __init__(self, url):
+        self.url = url
+        self.status = None
+        self.retry_after = None
+
+class HostBudget:
+    """Seau à jetons et budget de concurrence d'un hôte"""
+
+    def __init__(self, host, rate=1.0, burst=3, max_concurrency=4, min_rate=0.1, max_rate=4.0,
+                 increase=0.05, decrease=0.5, slow_factor=2.0, min_slowdown=0.5, cooldown=30.0, jitter=0.25):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.min_slowdown = min_slowdown
+        self.cooldown = cooldown
+        self.jitter = jitter
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency = None    # moyenne mobile exponentielle des latences (s)
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Attend un jeton et une place libre, puis réserve les deux"""
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.in_flight >= self.max_concurrency:
+                    delay = None  # réveillé par release()
+                elif self.tokens >= 1:
+                    break
+                else:
+                    delay = (1 - self.tokens) / self.rate
+                if delay is not None:
+                    delay *= 1 + random.uniform(0, self.jitter)
+                self._condition.wait(delay)
+            self.tokens -= 1
+            self.in_flight += 1
+            self.requests += 1
+            self.waited += time.monotonic() - start
+
+    def release(self, latency, request, failed):
+        """Libère la place et ajuste le débit d'après la réponse"""
+        with self._condition:
+            self.in_flight -= 1
+            if request.status in THROTTLE_STATUSES:
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                pause = request.retry_after if request.retry_after is not None else self.cooldown
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                self.tokens = 0.0
+                print(f"⚠️ {self.host}: limitation du serveur ({request.status}), pause de {pause:.1f} s "
+                      f"et débit réduit à {self.rate:.2f} req/s")
+            elif failed:
+                self.errors += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            elif (self.latency is not None and latency > self.slow_factor * self.latency
+                  and latency - self.latency > self.min_slowdown):
+                # Le serveur ralentit: on freine avant d'être bloqué
+                self.rate = max(self.min_rate, self.rate * (1 + self.decrease) / 2)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            if not failed:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            self._condition.notify_all()
+
+    def summary(self):
+        with self._condition:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "throttled": self.throttled,
+                "rate": round(self.rate, 3),
+                "latency_s": round(self.latency, 3) if self.latency is not None else None,
+                "waited_s": round(self.waited, 2),
+            }
+
+class RateLimiter:
+    """Budgets par hôte, créés à la première requête avec les réglages courants"""
+
+    def __init__(self, enabled=True, **settings):
+        self.enabled = enabled
+        self.settings = settings
+        self._budgets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=None, **settings):
+        """Modifie les réglages (ex: rate=2, max_concurrency=8); s'applique aussi aux hôtes connus"""
+        if enabled is not None:
+            self.enabled = enabled
+        settings = {name: value for name, value in settings.items() if value is not None}
+        with self._lock:
+            self.settings.update(settings)
+            budgets = list(self._budgets.values())
+        for budget in budgets:
+            with budget._condition:
+                for name, value in settings.items():
+                    setattr(budget, name, value)
+                budget._condition.notify_all()
+
+    def budget(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            budget = self._budgets.get(host)
+            if budget is None:
+                budget = self._budgets[host] = HostBudget(host, **self.settings)
+            return budget
+
+    @contextmanager
+    def slot(self, url):
+        """Réserve une requête vers l'hôte de url; la durée du bloc sert de latence"""
+        request = Request(url)
+        if not self.enabled:
+            yield request
+            return
+        budget = self.budget(url)
+        budget.acquire()
+        start = time.monotonic()
+        failed = False
+        try:
+            yield request
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            budget.release(time.monotonic() - start, request, failed)
+
+    def summary(self):
+        with self._lock:
+            budgets = dict(self._budgets)
+        return {host: budget.summary() for host, budget in sorted(budgets.items())}
+
+    def report(self):
+        """Affiche, par hôte, le débit atteint et les limitations rencontrées"""
+        summary = self.summary()
+        if not summary:
+            return
+        print("\n=== Cadence des requêtes ===")
+        for host, stats in summary.items():
+            latency = f"{stats['latency_s']:.2f} s" if stats["latency_s"] is not None else "n/d"
+            print(f"{host}: {stats['requests']} requêtes, débit final {stats['rate']:.2f} req/s, "
+                  f"latence moyenne {latency}, {stats['waited_s']:.1f} s d'attente, "
+                  f"{stats['errors']} erreurs, {stats['throttled']} limitations")
+
+# Limiteur partagé par tous les navigateurs et sessions HTTP du processus
+rate_limiter = RateLimiter()
+
+def navigation_status(driver):
+    """Statut HTTP de la page chargée dans le navigateur (None s'il est inconnu)"""
+    try:
+        return driver.execute_script(_NAVIGATION_STATUS_JS)
+    except Exception:
+        return None
+
+def polite_get(driver, url, limiter=None):
+    """driver.get(url) en respectant le budget de l'hôte; retourne le statut HTTP s'il est connu"""
+    limiter = limiter or rate_limiter
+    with limiter.slot(url) as request:
+        driver.get(url)
+        count_page_load(driver)
+        if limiter.enabled:
+            request.status = navigation_status(driver)
+    return request.status
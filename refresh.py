@@ -0,0 +1,259 @@
+"""Rafraîchissement de la seule "Prochaine disponibilité" des médecins déjà connus.
+
+Part d'un fichier de résultats existant (CSV, SQLite ou Parquet) et ne revérifie
+que la disponibilité:
+
+    - résultats de main.py / batch_main.py (cartes): la recherche est rejouée et
+      chaque page de résultats est lue en un seul appel execute_script limité au
+      nom et à la disponibilité (ni adresse, ni secteur, ni prix), jusqu'à ce que
+      tous les médecins connus aient été retrouvés;
+    - résultats de one_doctor_main.py (profils, avec url): chaque profil est
+      retéléchargé en HTTP et seuls name et availability sont analysés, le
+      navigateur ne servant qu'aux pages qui exigent JavaScript.
+
+Seuls les créneaux qui ont changé sont écrits dans un fichier delta:
+
+    python refresh.py resultats_doctolib.csv --specialite pediatre --lieu lyon
+    python refresh.py data/pediatre_lyon.csv --output delta.csv
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+import requests
+from selenium.webdriver.common.by import By
+from dedup_index import normalize_text
+from doctolib_scraper import (
+    BROWSER_PROFILES,
+    NAVIGATION_METHODS,
+    setup_driver,
+    search_doctors,
+    iter_result_pages,
+    extract_card_texts
+)
+from driver_pool import DriverPool
+from http_engine import fetch_profile
+from instrumentation import stage
+from normalize import format_availability, parse_availability
+from output_sinks import StreamingCsvWriter, output_format_for, pq
+from rate_limiter import polite_get
+from scraping_a_doctor import setup_profile_driver, extract_profile_info
+from waits import wait_for_presence
+from doctolib_selectors import selector_registry
+from cli import add_politeness_arguments, configure_politeness, print_run_reports
+
+# Colonnes du fichier delta
+DELTA_FIELDNAMES = ["Nom complet", "Référence", "Ancienne disponibilité", "Nouvelle disponibilité",
+                    "Date de disponibilité"]
+
+# Champs lus pendant un rafraîchissement (le nom sert à reconnaître le médecin)
+CARD_REFRESH_FIELDS = ("name", "availability")
+PROFILE_REFRESH_FIELDS = ("name", "availability")
+
+def read_records(path, table="medecins"):
+    """Enregistrements d'un fichier de résultats CSV, SQLite ou Parquet"""
+    output_format = output_format_for(path)
+    if output_format == "sqlite":
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute(f'SELECT * FROM "{table}"')]
+        finally:
+            conn.close()
+    if output_format == "parquet":
+        if pq is None:
+            raise RuntimeError("La lecture Parquet nécessite pyarrow (pip install pyarrow)")
+        return pq.read_table(path).to_pylist()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+def availability_datetime(value, today):
+    """Date et heure d'une disponibilité: texte brut relatif à today, ou valeur déjà normalisée"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value[:4].isdigit():
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return parse_availability(value, today)
+
+def availability_changed(old, new, old_today, today):
+    """Vrai si le créneau a changé (comparaison des dates et heures, sinon des textes)"""
+    old_slot, new_slot = availability_datetime(old, old_today), availability_datetime(new, today)
+    if old_slot is not None or new_slot is not None:
+        return old_slot != new_slot
+    return (old or "") != (new or "")
+
+class AvailabilityDelta:
+    """Compare les disponibilités retrouvées aux anciennes et écrit les changements"""
+
+    def __init__(self, filename, reference_day):
+        self.reference_day = reference_day  # jour où l'ancien fichier a été écrit
+        self.today = datetime.now()
+        self.checked = 0
+        self.changed = 0
+        self._writer = StreamingCsvWriter(filename, DELTA_FIELDNAMES)
+
+    def compare(self, name, reference, old, new):
+        self.checked += 1
+        if not availability_changed(old, new, self.reference_day, self.today):
+            return False
+        slot = availability_datetime(new, self.today)
+        self._writer.write({
+            "Nom complet": name,
+            "Référence": reference,
+            "Ancienne disponibilité": format_availability(old) if isinstance(old, datetime) else old,
+            "Nouvelle disponibilité": new,
+            "Date de disponibilité": format_availability(slot) if slot else "",
+        })
+        self.changed += 1
+        return True
+
+    def finalize(self):
+        self._writer.finalize()
+
+class _KnownCards:
+    """Médecins connus d'un fichier de cartes, retrouvés par nom (et code postal en cas d'homonymes)"""
+
+    def __init__(self, records):
+        self._by_name = {}
+        for record in records:
+            name = record.get("Nom complet")
+            if name and name != "Non spécifié":
+                self._by_name.setdefault(normalize_text(name), []).append(record)
+        self.remaining = sum(len(candidates) for candidates in self._by_name.values())
+        self.has_homonyms = any(len(candidates) > 1 for candidates in self._by_name.values())
+
+    def pop(self, name, address=None):
+        candidates = self._by_name.get(normalize_text(name or ""))
+        if not candidates:
+            return None
+        index = 0
+        if len(candidates) > 1 and address:
+            index = next((i for i, record in enumerate(candidates)
+                          if record.get("Code postal") and str(record["Code postal"]) in address), 0)
+        self.remaining -= 1
+        return candidates.pop(index)
+
+def refresh_cards(driver, wait, records, delta, max_pages=None):
+    """Rejoue une recherche et compare la disponibilité de chaque carte retrouvée"""
+    known = _KnownCards(records)
+    # L'adresse brute n'est lue que pour départager des homonymes
+    fields = CARD_REFRESH_FIELDS + (("address",) if known.has_homonyms else ())
+    for page, cards in iter_result_pages(driver, wait, max_pages):
+        with stage("page_disponibilites"):
+            raws = extract_card_texts(driver, cards, fields, prices=False, links=False)
+        for raw in raws:
+            record = known.pop(raw.get("name"), raw.get("address"))
+            if record is not None:
+                delta.compare(record["Nom complet"], record.get("Code postal", ""),
+                              record.get("Prochaine disponibilité"), raw.get("availability") or "Non spécifié")
+        print(f"✓ Page {page}: {len(raws)} cartes, {known.remaining} médecins connus restant à retrouver")
+        if not known.remaining:
+            break
+    return known.remaining
+
+def _profile_availability_in_browser(driver, url):
+    """Disponibilité d'un profil qui exige JavaScript"""
+    polite_get(driver, url)
+    wait_for_presence(driver, (By.CSS_SELECTOR, "h1"), "profil")
+    return extract_profile_info(driver, PROFILE_REFRESH_FIELDS)
+
+def refresh_profiles(records, delta, concurrency=8, browser_profile="lean"):
+    """Retélécharge chaque profil connu et compare sa disponibilité; retourne le nombre d'échecs"""
+    records = [record for record in records if record.get("url") and record["url"] != "Unknown"]
+    results = [None] * len(records)
+
+    def fetch(index):
+        try:
+            with stage("disponibilite_http"):
+                results[index] = fetch_profile(records[index]["url"], fields=PROFILE_REFRESH_FIELDS)
+        except requests.RequestException as e:
+            print(f"⚠️ Échec HTTP pour {records[index]['url']}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        list(executor.map(fetch, range(len(records))))
+
+    # Les pages rendues côté client passent par un seul navigateur, démarré seulement si besoin
+    fallback = [index for index, result in enumerate(results) if result is None]
+    if fallback:
+        driver = setup_profile_driver(profile=browser_profile)
+        try:
+            for index in fallback:
+                try:
+                    with stage("disponibilite_navigateur"):
+                        results[index] = _profile_availability_in_browser(driver, records[index]["url"])
+                except Exception as e:
+                    print(f"Error refreshing {records[index]['url']}: {e}")
+        finally:
+            driver.quit()
+
+    failures = 0
+    for record, result in zip(records, results):
+        if result is None:
+            failures += 1
+            continue
+        delta.compare(record.get("name", ""), record["url"], record.get("availability"), result["availability"])
+    return failures
+
+def default_delta_path(path):
+    return f"{os.path.splitext(path)[0]}.delta_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+
+def main():
+    parser = argparse.ArgumentParser(description="Rafraîchit la prochaine disponibilité des médecins déjà extraits")
+    parser.add_argument("input", help="Fichier de résultats (CSV, SQLite ou Parquet)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Fichier delta des créneaux modifiés (par défaut: <input>.delta_<date>.csv)")
+    parser.add_argument("--specialite", type=str, default=None, help="Spécialité de la recherche (fichier de cartes)")
+    parser.add_argument("--lieu", type=str, default=None, help="Localisation de la recherche (fichier de cartes)")
+    parser.add_argument("--max_pages", type=int, default=None, help="Nombre maximum de pages de résultats")
+    parser.add_argument("--navigation", choices=NAVIGATION_METHODS, default="url")
+    parser.add_argument("--http_concurrency", type=int, default=8, help="Profils téléchargés en parallèle")
+    parser.add_argument("--browser_profile", choices=BROWSER_PROFILES, default="lean")
+    add_politeness_arguments(parser)
+    args = parser.parse_args()
+    configure_politeness(args)
+
+    records = read_records(args.input)
+    if not records:
+        print(f"❌ Aucun médecin dans {args.input}")
+        return
+    profiles = "url" in records[0]
+    if not profiles and not (args.specialite and args.lieu):
+        parser.error("--specialite et --lieu sont nécessaires pour rafraîchir un fichier de cartes")
+
+    output = args.output or default_delta_path(args.input)
+    reference_day = datetime.fromtimestamp(os.path.getmtime(args.input))
+    delta = AvailabilityDelta(output, reference_day)
+    selector_registry.load()
+    start = time.perf_counter()
+    missing = 0
+    try:
+        if profiles:
+            missing = refresh_profiles(records, delta, args.http_concurrency, args.browser_profile)
+        else:
+            pool = DriverPool(size=1, driver_factory=partial(setup_driver, profile=args.browser_profile))
+            try:
+                with pool.session() as session:
+                    if search_doctors(session.driver, session.wait, args.specialite, args.lieu,
+                                      method=args.navigation):
+                        missing = refresh_cards(session.driver, session.wait, records, delta, args.max_pages)
+                    else:
+                        missing = len(records)
+            finally:
+                pool.close()
+    finally:
+        delta.finalize()
+        selector_registry.save()
+        elapsed = time.perf_counter() - start
+        print(f"\n✓ {delta.checked} disponibilités vérifiées en {elapsed:.1f} s, {delta.changed} modifiées "
+              f"({output}), {missing} médecins non retrouvés")
+        print_run_reports(args.browser_profile)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""Moteur commun aux deux extractions: cartes seules ou cartes et profils.
+
+main.py / batch_main.py (colonnes françaises) et one_doctor_main.py (colonnes
+anglaises) passent tous par scrape(): même navigateur (pool, profil lean,
+cookies), même recherche (URL directe, repli sur le formulaire), même lecture
+des pages de résultats (&page=N, moteurs webdriver/js/html) et, avec
+depth="profils", mêmes moteurs de profils (webdriver, html, http), cache,
+points de reprise et déduplication. Chaque médecin est un DoctorRecord, écrit
+avec les colonnes de la profondeur demandée:
+
+    records = scrape("pediatre", "lyon", depth=DEPTH_CARDS, pool=pool)
+    records = scrape("pediatre", "lyon", depth=DEPTH_PROFILES, profile_engine="http")
+"""
+import sys
+from contextlib import contextmanager
+from checkpoint import PROFILE
+from doctolib_scraper import HOME_URL, CSV_FIELDNAMES, setup_driver, search_doctors, scrape_doctors
+from driver_pool import DriverSession
+from http_engine import fetch_profiles
+from normalize import parse_address
+from scraping_a_doctor import PROFILE_ENGINES, PROFILE_FIELDNAMES, scrape_profile, scrape_profiles_parallel
+from rate_limiter import polite_get
+from waits import wait_for_page_ready
+
+# Profondeurs d'extraction
+DEPTH_CARDS = "cartes"
+DEPTH_PROFILES = "profils"
+DEPTHS = (DEPTH_CARDS, DEPTH_PROFILES)
+
+# Colonnes écrites pour chaque profondeur
+DEPTH_FIELDNAMES = {DEPTH_CARDS: CSV_FIELDNAMES, DEPTH_PROFILES: PROFILE_FIELDNAMES}
+
+# Valeur manquante de chaque vocabulaire, telle qu'écrite dans les fichiers
+CARD_MISSING = "Non spécifié"
+PROFILE_MISSING = "Unknown"
+
+# Colonne des cartes -> attribut de DoctorRecord
+CARD_COLUMNS = {
+    "Nom complet": "name",
+    "Spécialité": "specialty",
+    "Prochaine disponibilité": "availability",
+    "Secteur d'assurance": "sector",
+    "Prix estimé": "price",
+    "Rue": "street",
+    "Code postal": "postal_code",
+    "Ville": "city",
+    "url": "url",
+}
+
+# Valeurs très répétées d'un médecin à l'autre: une seule copie en mémoire
+INTERNED_FIELDS = frozenset(("specialty", "sector", "city", "convention"))
+
+class _Missing:
+    """Valeur absente d'un DoctorRecord (faux en contexte booléen), au lieu d'une chaîne par champ"""
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "MISSING"
+
+    def __reduce__(self):
+        return "MISSING"
+
+MISSING = _Missing()
+
+def _known(value, missing):
+    """value, ou MISSING si elle est vide ou vaut le texte de remplacement missing"""
+    return MISSING if value is MISSING or value in (None, "", missing) else value
+
+def _interned(field, value):
+    if field in INTERNED_FIELDS and value.__class__ is str:
+        return sys.intern(value)
+    return value
+
+class DoctorRecord:
+    """Un médecin, qu'il vienne d'une carte de résultats, d'un profil ou des deux
+
+    Enregistrement compact (__slots__, sans dictionnaire par instance): les champs
+    absents valent MISSING et les textes répétés (INTERNED_FIELDS) sont partagés.
+    get(colonne) lit une colonne de l'un ou l'autre vocabulaire, avec son texte de
+    remplacement: les writers d'output_sinks et DedupIndex acceptent donc un
+    DoctorRecord comme un dictionnaire de ligne, sans conversion.
+    """
+
+    FIELDS = ("name", "specialty", "availability", "sector", "price", "street", "postal_code", "city",
+              "address", "tarif", "convention", "url")
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, _interned(field, values.get(field, MISSING)))
+
+    def __repr__(self):
+        return f"DoctorRecord({self.name!r}, {self.url!r})"
+
+    @classmethod
+    def from_card(cls, info):
+        """Depuis un dictionnaire de carte (build_doctor_info)"""
+        return cls(**{field: _known(info.get(column), CARD_MISSING) for column, field in CARD_COLUMNS.items()})
+
+    @classmethod
+    def from_profile(cls, info, url=None):
+        """Depuis un dictionnaire de profil (extract_profile_info / parse_profile_html)"""
+        record = cls()
+        record.add_profile(info)
+        record.url = url or _known(info.get("url"), PROFILE_MISSING)
+        return record
+
+    @classmethod
+    def from_row(cls, row, depth):
+        """Depuis une ligne écrite avec les colonnes de depth (ex: payload d'un point de reprise)"""
+        return cls.from_card(row) if depth == DEPTH_CARDS else cls.from_profile(row)
+
+    def add_profile(self, info):
+        """Complète la carte avec les champs trouvés sur la page de profil (prioritaires)"""
+        for field in PROFILE_FIELDNAMES:
+            value = _known(info.get(field), PROFILE_MISSING)
+            if value is not MISSING and field != "url":
+                setattr(self, field, _interned(field, value))
+        if self.address:
+            # L'adresse du profil remplace aussi les parties lues sur la carte
+            street, postal_code, city = parse_address(self.address)
+            self.street = street or MISSING
+            self.postal_code = postal_code or MISSING
+            self.city = _interned("city", city) if city else MISSING
+        return self
+
+    def full_address(self):
+        if self.address:
+            return self.address
+        locality = " ".join(part for part in (self.postal_code, self.city) if part)
+        return ", ".join(part for part in (self.street, locality) if part) or MISSING
+
+    def address_parts(self):
+        """(rue, code postal, ville), déduits de l'adresse complète si la carte ne les a pas fournis"""
+        parts = (self.street, self.postal_code, self.city)
+        if not any(parts) and self.address:
+            return parse_address(self.address)
+        return parts
+
+    def get(self, column, default=None):
+        """Valeur d'une colonne des cartes ou des profils, comme dict.get sur la ligne écrite"""
+        getter = _COLUMN_GETTERS.get(column)
+        return default if getter is None else getter(self)
+
+    def __contains__(self, column):
+        return column in _COLUMN_GETTERS
+
+    def as_card_row(self):
+        """Ligne avec les colonnes des cartes (CSV_FIELDNAMES, plus url si elle est connue)"""
+        row = {column: self.get(column) for column in CARD_COLUMNS if column != "url"}
+        if self.url:
+            row["url"] = self.url
+        return row
+
+    def as_profile_row(self):
+        """Ligne avec les colonnes des profils (PROFILE_FIELDNAMES)"""
+        return {field: self.get(field) for field in PROFILE_FIELDNAMES}
+
+    def as_row(self, depth):
+        return self.as_card_row() if depth == DEPTH_CARDS else self.as_profile_row()
+
+def _address_part(index):
+    return lambda record: record.address_parts()[index] or CARD_MISSING
+
+# Colonne (cartes ou profils) -> lecture de sa valeur sur un DoctorRecord
+_COLUMN_GETTERS = {
+    "Nom complet": lambda record: record.name or CARD_MISSING,
+    "Spécialité": lambda record: record.specialty or CARD_MISSING,
+    "Prochaine disponibilité": lambda record: record.availability or CARD_MISSING,
+    "Secteur d'assurance": lambda record: record.sector or record.convention or CARD_MISSING,
+    "Prix estimé": lambda record: record.price or record.tarif or CARD_MISSING,
+    "Rue": _address_part(0),
+    "Code postal": _address_part(1),
+    "Ville": _address_part(2),
+    "name": lambda record: record.name or PROFILE_MISSING,
+    "specialty": lambda record: record.specialty or PROFILE_MISSING,
+    "address": lambda record: record.full_address() or PROFILE_MISSING,
+    "availability": lambda record: record.availability or PROFILE_MISSING,
+    "tarif": lambda record: record.tarif or record.price or PROFILE_MISSING,
+    "convention": lambda record: record.convention or record.sector or PROFILE_MISSING,
+    "url": lambda record: record.url or PROFILE_MISSING,
+}
+
+class _RecordCollector:
+    """Sink passé à scrape_doctors: transforme chaque carte en DoctorRecord"""
+
+    def __init__(self, on_record):
+        self.on_record = on_record
+        self.rows = 0
+
+    def write(self, info):
+        self.on_record(DoctorRecord.from_card(info))
+        self.rows += 1
+
+@contextmanager
+def browser_session(pool=None, browser_profile="full"):
+    """Session prête (page d'accueil chargée, cookies acceptés), empruntée au pool ou créée pour l'occasion"""
+    if pool is not None:
+        with pool.session() as session:
+            yield session
+        return
+    session = DriverSession(setup_driver(browser_profile))
+    try:
+        session.warm_up()
+        yield session
+    finally:
+        session.quit()
+
+def scrape(specialty, location, depth=DEPTH_CARDS, pool=None, browser_profile="full", navigation="url",
+           card_engine="webdriver", profile_engine="webdriver", max_results=None, max_pages=None, sink=None,
+           checkpoint=None, dedup=None, cache=None, workers=1, http_concurrency=8, snapshot_dir=None):
+    """Recherche les médecins d'une spécialité et d'un lieu; retourne leurs DoctorRecord
+
+    depth=DEPTH_CARDS s'arrête aux cartes de résultats; depth=DEPTH_PROFILES visite
+    aussi la page de profil de chaque carte (profile_engine, workers, cache).
+    Si sink est fourni, chaque médecin y est écrit dès qu'il est complet, avec les
+    colonnes de depth (DEPTH_FIELDNAMES), et la liste retournée reste vide.
+    """
+    if depth not in DEPTHS:
+        raise ValueError(f"Profondeur d'extraction inconnue: {depth}")
+    if profile_engine not in PROFILE_ENGINES:
+        raise ValueError(f"Moteur de profil inconnu: {profile_engine}")
+
+    if depth == DEPTH_CARDS:
+        records = []
+
+        def keep(record):
+            if sink is not None:
+                sink.write(record)
+            else:
+                records.append(record)
+
+        with browser_session(pool, browser_profile) as session:
+            if not _search(session, specialty, location, navigation):
+                return records
+            scrape_doctors(session.driver, session.wait, max_results, engine=card_engine,
+                           snapshot_dir=snapshot_dir, sink=_RecordCollector(keep), checkpoint=checkpoint,
+                           max_pages=max_pages, dedup=dedup)
+        return records
+
+    with browser_session(pool, browser_profile) as session:
+        cards = _search_cards(session, specialty, location, navigation, card_engine, max_results, max_pages,
+                              snapshot_dir, checkpoint)
+        visited = _visit_profiles(session.driver, cards, profile_engine, sink, checkpoint, dedup, cache,
+                                  workers, http_concurrency, snapshot_dir, browser_profile)
+
+    # Fiches dans l'ordre des cartes, y compris celles d'une exécution précédente
+    records = []
+    for card in cards:
+        record = visited.get(card.url)
+        if record is None and checkpoint is not None:
+            payload = checkpoint.payload(PROFILE, card.url)
+            record = DoctorRecord.from_profile(payload, card.url) if payload else None
+        if record is not None:
+            records.append(record)
+    print(f"\n✓ {len(records)} médecins extraits avec leur profil")
+    return [] if sink is not None else records
+
+def _search(session, specialty, location, navigation):
+    """Lance la recherche; une session déjà utilisée repart de la page d'accueil pour le formulaire"""
+    if navigation == "form" and session.searches:
+        polite_get(session.driver, HOME_URL)
+        wait_for_page_ready(session.driver)
+    print(f"Recherche des médecins pour: {specialty} à {location}")
+    if search_doctors(session.driver, session.wait, specialty, location, method=navigation):
+        return True
+    print("❌ La recherche n'a pas donné de résultats.")
+    return False
+
+def stream_cards(session, specialty, location, on_card, navigation="url", card_engine="js", max_results=None,
+                 max_pages=None, snapshot_dir=None):
+    """Lance la recherche et passe chaque carte (DoctorRecord) à on_card dès son extraction
+
+    Retourne False si la recherche n'a pas abouti. Sert de source de liens de
+    profil au pipeline, qui visite les profils pendant la lecture des pages.
+    """
+    if not _search(session, specialty, location, navigation):
+        return False
+    scrape_doctors(session.driver, session.wait, max_results, engine=card_engine, snapshot_dir=snapshot_dir,
+                   sink=_RecordCollector(on_card), max_pages=max_pages)
+    return True
+
+def _search_cards(session, specialty, location, navigation, card_engine, max_results, max_pages, snapshot_dir,
+                  checkpoint):
+    """Cartes (avec lien de profil) de la recherche, ou celles enregistrées par une exécution interrompue"""
+    if checkpoint is not None and checkpoint.get_state("doctor_cards"):
+        cards = [DoctorRecord.from_card(info) for info in checkpoint.get_state("doctor_cards")]
+        print(f"Reprise avec les {len(cards)} cartes du point de reprise")
+        return cards
+
+    # Les cartes sont seulement collectées: le point de reprise et la déduplication portent sur les profils
+    cards = []
+    stream_cards(session, specialty, location, cards.append, navigation, card_engine, max_results, max_pages,
+                 snapshot_dir)
+    without_link = [card for card in cards if not card.url]
+    if without_link:
+        print(f"⚠️ {len(without_link)} cartes sans lien vers un profil ignorées")
+    seen = set()
+    cards = [card for card in cards if card.url and not (card.url in seen or seen.add(card.url))]
+    if checkpoint is not None and cards:
+        checkpoint.set_state("doctor_cards", [card.as_card_row() for card in cards])
+    return cards
+
+def _visit_profiles(driver, cards, engine, sink, checkpoint, dedup, cache, workers, http_concurrency,
+                    snapshot_dir, browser_profile):
+    """Visite les profils pas encore extraits; retourne {url: DoctorRecord} des nouvelles fiches"""
+    by_url = {card.url: card for card in cards}
+    # Les profils terminés lors d'une exécution précédente ne sont pas revisités
+    pending = [card.url for card in cards if checkpoint is None or not checkpoint.is_done(PROFILE, card.url)]
+    if len(pending) < len(cards):
+        print(f"↷ {len(cards) - len(pending)} profils déjà extraits lors d'une exécution précédente")
+    # Ni les médecins déjà connus d'autres requêtes ou exécutions
+    if dedup is not None:
+        known = len(pending)
+        pending = [url for url in pending if not dedup.seen({}, url)]
+        if len(pending) < known:
+            print(f"↷ {known - len(pending)} médecins déjà présents dans l'index de déduplication")
+    visited = {}
+
+    def profile_done(url, doctor_info):
+        record = by_url[url].add_profile(doctor_info)
+        row = record.as_profile_row()
+        visited[url] = record
+        if checkpoint is not None:
+            checkpoint.mark_done(PROFILE, url, row)
+        if dedup is not None:
+            dedup.add(row)
+        if sink is not None:
+            sink.write(record)
+
+    if engine == "http":
+        # Les profils rendus côté serveur se passent du navigateur; seuls ceux qui exigent JavaScript y retournent
+        results = fetch_profiles(pending, concurrency=http_concurrency, cache=cache,
+                                 on_result=lambda index, doctor_info: profile_done(pending[index], doctor_info))
+        pending = [url for url, doctor_info in zip(pending, results) if doctor_info is None]
+        engine = "html"
+
+    if workers > 1:
+        # Le navigateur de la recherche est libre: les profils sont répartis entre des navigateurs headless
+        scrape_profiles_parallel(
+            pending, workers, engine, snapshot_dir,
+            driver_factory=lambda: setup_driver(browser_profile, headless=True),
+            on_result=lambda index, doctor_info: profile_done(pending[index], doctor_info),
+            cache=cache)
+    else:
+        for i, url in enumerate(pending):
+            try:
+                print(f"Profil {i+1}/{len(pending)}: {url}")
+                profile_done(url, scrape_profile(driver, url, engine, snapshot_dir, i, cache))
+                print(f"✓ Profil {i+1}: {visited[url].name}")
+            except Exception as e:
+                print(f"⚠️ Erreur pour le profil {i+1}: {e}")
+    return visited
@@ -1,223 +1,272 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 import os
+import queue
+import threading
+from waits import wait_for_presence
+from doctolib_selectors import (
+    PROFILE_FIELD_SELECTORS,
+    PROFILE_ADDRESS_FALLBACK_XPATH,
+    PROFILE_ADDRESS_KEYWORDS,
+    selector_registry
+)
+from html_engine import parse_profile_html, snapshot_page
+from doctolib_scraper import (
+    CSV_FIELDNAMES,
+    setup_driver,
+    slugify
+)
+from browser_metrics import record_page_load
+from dedup_index import DedupIndex
+from output_sinks import OUTPUT_EXTENSIONS, open_sink
+from instrumentation import instrumented
+from rate_limiter import polite_get
+
+# Columns of the profile CSV files
+PROFILE_FIELDNAMES = ["name", "specialty", "address", "availability", "tarif", "convention", "url"]
+ 
+# Profile extraction engines ("http" fetches pages without the browser, falling back to "html")
+PROFILE_ENGINES = ("webdriver", "html", "http")
+ 
+def setup_profile_driver(headless=False, profile="full"):
+    """Set up the WebDriver ("lean" profile: headless, no images, blocked trackers); same browser as the card scraper"""
+    return setup_driver(profile, headless=headless)
  
 def scrape_doctolib(params):
-    # Set up the WebDriver with improved options
-    chrome_options = webdriver.ChromeOptions()
-    chrome_options.add_argument("--disable-gpu")  # Disable GPU hardware acceleration
-    chrome_options.add_argument("--disable-extensions")  # Disable extensions
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])  # Disable logging
-   
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    """Search doctors and scrape their profile pages, then export them to data/.
+ 
+    Runs on the shared core (scraper_core.scrape) with depth "profils" unless
+    params["depth"] is "cartes"; params keys: query, location, max_results, max_pages,
+    engine (profile engine), card_engine, navigation, snapshot_dir, workers,
+    http_concurrency, driver_pool, browser_profile, checkpoint, dedup, cache, output_format.
+    Returns the DoctorRecord of each doctor (compact records, written as they are).
+    """
+    from scraper_core import DEPTH_PROFILES, scrape
     print("Script started...")
-   
-    wait = WebDriverWait(driver, 20)
-   
+    specialty = slugify(params.get("query", "medecin-generaliste"))
+    location = slugify(params.get("location", "75008"))
+    depth = params.get("depth", DEPTH_PROFILES)
     try:
-        # Construct direct search URL instead of using the form
-        specialty = params.get("query", "medecin-generaliste")
-        location = params.get("location", "75008")
-       
-        # Format the URL - ensure the specialty and location are properly formatted
-        specialty = specialty.lower().replace(" ", "-")
-        location = location.replace(" ", "-")
-       
-        # Direct URL to search results
-        search_url = f"https://www.doctolib.fr/search?location={location}&speciality={specialty}"
-       
-        print(f"Navigating directly to search URL: {search_url}")
-        driver.get(search_url)
-        time.sleep(3)  # Wait for page to load
-       
-        # Accept cookies if popup appears
-        try:
-            cookie_button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Accepter') or contains(text(), 'accepter')]")),
-                timeout=5
-            )
-            cookie_button.click()
-            print("Accepted cookies")
-        except:
-            print("No cookies popup found or already accepted")
-           
-        # Wait for search results to load
-        try:
-            total_results = wait.until(EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "div[data-test='total-number-of-results']")
-            ))
-            print(f"Found results: {total_results.text}")
-        except:
-            print("Could not find total results element, but continuing...")
- 
-        # Get links to doctor profiles
-        doctor_links = []
+        records = scrape(
+            specialty, location, depth,
+            pool=params.get("driver_pool"),
+            browser_profile=params.get("browser_profile", "full"),
+            navigation=params.get("navigation", "url"),
+            card_engine=params.get("card_engine", "js"),
+            profile_engine=params.get("engine", "webdriver"),
+            max_results=params.get("max_results"),
+            max_pages=params.get("max_pages"),
+            checkpoint=params.get("checkpoint"),
+            dedup=params.get("dedup"),
+            cache=params.get("cache"),
+            workers=params.get("workers", 1),
+            http_concurrency=params.get("http_concurrency", 8),
+            snapshot_dir=params.get("snapshot_dir"))
+    except Exception as e:
+        print("Error occurred during the scraping process:")
+        print(e)
+        return []
+ 
+    print(f"\nSuccessfully scraped {len(records)} doctors")
+    # Export results (CSV by default)
+    export_to_csv(records, specialty, location, params.get("output_format") or "csv", depth)
+    if params.get("checkpoint") is not None:
+        params["checkpoint"].complete()  # the run went through: no need to keep the checkpoint
+    return records
+ 
+@instrumented("profil")
+def scrape_profile(driver, url, engine="webdriver", snapshot_dir=None, index=0, cache=None):
+    """Load a doctor profile page and extract its fields (fresh cached fields are served, stale ones re-extracted)"""
+    cached, fields = cache.lookup(url) if cache is not None else (None, None)
+    if cached is not None and not fields:
+        return cached
+ 
+    polite_get(driver, url)
+    # Wait for the profile header instead of a fixed delay
+    wait_for_presence(driver, (By.CSS_SELECTOR, "h1"), "profil")
+    record_page_load(driver, "profil")
+ 
+    if engine == "html":
+        # Parse a single snapshot of the page instead of live elements
+        html = snapshot_page(driver, snapshot_dir, f"profile_{index+1}.html")
+        doctor_info = parse_profile_html(html, fields)
+    else:
+        html = None
+        doctor_info = extract_profile_info(driver, fields)
+ 
+    # A page without a name was not rendered yet: caching it would serve the failure until the TTL expires
+    if cache is not None and doctor_info.get("name", "Unknown") != "Unknown":
+        if html is None and cache.store_html:
+            html = driver.page_source
+        cache.put(url, doctor_info, html)
+    return doctor_info if cached is None else dict(cached, **doctor_info)
+ 
+def scrape_profiles_parallel(urls, workers=4, engine="webdriver", snapshot_dir=None,
+                             max_attempts=2, driver_factory=None, on_result=None, cache=None):
+    """Scrape profile URLs with a pool of headless browsers.
+ 
+    URLs are sharded round-robin across the workers, each owning its own driver.
+    A failed URL is handed to the next live worker until max_attempts is reached.
+    Returns one result per URL, in input order (None for URLs that kept failing).
+    on_result(index, doctor_info) is called from the worker thread as soon as a URL succeeds.
+    """
+    if driver_factory is None:
+        driver_factory = lambda: setup_driver(headless=True)
+    results = [None] * len(urls)
+    if not urls:
+        return results
+ 
+    n_workers = max(1, min(workers, len(urls)))
+    queues = [queue.Queue() for _ in range(n_workers)]
+    for index, url in enumerate(urls):
+        queues[index % n_workers].put((index, url, 0))
+ 
+    lock = threading.Lock()
+    alive = set(range(n_workers))
+    remaining = [len(urls)]
+    done = threading.Event()
+    stats = []
+ 
+    def task_finished():
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                done.set()
+ 
+    def route(task, from_worker):
+        # Hand the task to the next live worker, preferring a different one
+        with lock:
+            if not alive:
+                return False
+            for step in range(1, n_workers + 1):
+                target = (from_worker + step) % n_workers
+                if target in alive:
+                    queues[target].put(task)
+                    return True
+        return False
+ 
+    def drain(worker_id):
+        # Give back every queued task of a worker that can no longer run
+        with lock:
+            alive.discard(worker_id)
+        while True:
+            try:
+                task = queues[worker_id].get_nowait()
+            except queue.Empty:
+                break
+            if not route(task, worker_id):
+                task_finished()
+ 
+    def run_worker(worker_id):
+        pages, failures = 0, 0
+        start = time.perf_counter()
+        driver = None
         try:
-            # Wait for cards to appear
-            cards = wait.until(EC.presence_of_all_elements_located(
-                (By.CSS_SELECTOR, "div.dl-search-result, div.dl-card-content")
-            ))
-           
-            print(f"Found {len(cards)} doctor cards")
-           
-            # Process first 10 cards (or fewer if there aren't that many)
-            max_doctors = min(20, len(cards))
-           
-            for card in cards[:max_doctors]:
+            driver = driver_factory()
+            while not done.is_set():
                 try:
-                    # Try to find link with more specific XPath or CSS selector
-                    link_element = card.find_element(By.CSS_SELECTOR, "a[href*='/']")
-                    link = link_element.get_attribute("href")
-                    if link and ("/medecin" in link or "/dentiste" in link or "/sage-femme" in link
-                               or link.startswith("https://www.doctolib.fr/")):
-                        doctor_links.append(link)
-                        print(f"Found doctor link: {link}")
-                except Exception as link_error:
-                    print(f"Error finding link in card: {link_error}")
+                    index, url, attempts = queues[worker_id].get(timeout=0.2)
+                except queue.Empty:
                     continue
-           
-            print(f"Collected {len(doctor_links)} doctor links to visit")
-           
-        except Exception as cards_error:
-            print(f"Error finding doctor cards: {cards_error}")
-            return []
- 
-        # Now scrape each doctor profile
-        doctors = []
-        for i, url in enumerate(doctor_links):
-            try:
-                print(f"Visiting doctor {i+1} at URL: {url}")
-                driver.get(url)
-                time.sleep(2)  # Wait for page to load
- 
-                doctor_info = {
-                    "name": "Unknown",
-                    "specialty": "Unknown",
-                    "address": "Unknown",
-                    "availability": "Unknown",
-                    "tarif": "Unknown",
-                    "convention": "Unknown"
-                }
- 
-                # Name
                 try:
-                    name_element = driver.find_element(By.CSS_SELECTOR, "h1.dl-text.dl-text-bold.dl-text-title.dl-text-xl.dl-profile-header-name")
-                    doctor_info["name"] = name_element.text.strip()
+                    results[index] = scrape_profile(driver, url, engine, snapshot_dir, index, cache)
+                    pages += 1
+                    print(f"[worker {worker_id}] Scraped doctor {index+1}: {results[index]['name']}")
+                    if on_result is not None:
+                        on_result(index, results[index])
+                    task_finished()
+                except Exception as visit_error:
+                    failures += 1
+                    attempts += 1
+                    if attempts < max_attempts and route((index, url, attempts), worker_id):
+                        print(f"[worker {worker_id}] Error on doctor {index+1}, retrying on another worker")
+                    else:
+                        print(f"[worker {worker_id}] Giving up on doctor {index+1}: {visit_error}")
+                        task_finished()
+        except Exception as worker_error:
+            print(f"[worker {worker_id}] Worker stopped: {worker_error}")
+        finally:
+            drain(worker_id)
+            if driver:
+                try:
+                    driver.quit()
                 except:
-                    try:
-                        name_element = driver.find_element(By.CSS_SELECTOR, "h1.dl-text.dl-text-bold.dl-text-title.dl-text-xl.dl-profile-header-name")
-                        doctor_info["name"] = name_element.text.strip()
-                    except Exception as name_error:
-                        print(f"Error extracting name: {name_error}")
+                    pass
+            elapsed = time.perf_counter() - start
+            with lock:
+                stats.append((worker_id, pages, failures, elapsed))
  
-                # Specialty
-                try:
-                    specialty_element = driver.find_element(By.CSS_SELECTOR, ".dl-profile-header-speciality")
-                    doctor_info["specialty"] = specialty_element.text.strip()
-                except Exception as specialty_error:
-                    print(f"Error extracting specialty: {specialty_error}")
+    threads = [threading.Thread(target=run_worker, args=(worker_id,), daemon=True)
+               for worker_id in range(n_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
  
-                # Address
-                try:
-                    address_element = driver.find_element(By.CSS_SELECTOR, ".dl-text.dl-text-body.dl-text-regular.dl-text-s.dl-text-neutral-130")
-                   
-                    doctor_info["address"] = address_element.text.strip()
-                except:
-                    try:
-                        address_element = driver.find_element(By.CSS_SELECTOR, ".dl-text.dl-text-body.dl-text-regular.dl-text-s.dl-text-neutral-130")
-                        doctor_info["address"] = address_element.text.strip()
-                    except:
-                        try:
-                            # Look for address in location info
-                            address_element = driver.find_element(By.CSS_SELECTOR, ".dl-text.dl-text-body.dl-text-regular.dl-text-s.dl-text-neutral-130")
-                            doctor_info["address"] = address_element.text.strip()
-                        except:
-                            try:
-                                # Try to find any element containing address information by broader search
-                                address_elements = driver.find_elements(By.XPATH,
-                                    "//*[contains(@class, 'address') or contains(@class, 'location')]")
-                               
-                                if address_elements:
-                                    for elem in address_elements:
-                                        text = elem.text.strip()
-                                        if text and any(s in text.lower() for s in ["rue", "avenue", "boulevard", "place"]):
-                                            doctor_info["address"] = text
-                                            break
-                            except Exception as address_error:
-                                print(f"Error extracting address: {address_error}")
- 
-                # Availability
-                try:
-                    slot_element = driver.find_element(By.CSS_SELECTOR, "div.availabilities-slot")
-                    doctor_info["availability"] = slot_element.text.strip()
-                except:
-                    try:
-                        avail_element = driver.find_element(By.CSS_SELECTOR, "div.booking-availabilities")
-                        doctor_info["availability"] = avail_element.text.strip()
-                    except Exception as avail_error:
-                        print(f"Error extracting availability: {avail_error}")
-                       
-                # Tarif (Price)
-                try:
-                    tarif_element = driver.find_element(By.CSS_SELECTOR, ".dl-profile-fee")
-                    doctor_info["tarif"] = tarif_element.text.strip()
-                except Exception as tarif_error:
-                    print(f"Error extracting tarif: {tarif_error}")
-                   
-                # Convention type
-                try:
-                    convention_element = driver.find_element(By.CSS_SELECTOR, "div.dl-profile-text p")
-                    doctor_info["convention"] = convention_element.text.strip()
-                except Exception as convention_error:
-                    print(f"Error extracting convention: {convention_error}")
- 
-                doctors.append(doctor_info)
-                print(f"Successfully scraped doctor {i+1}: {doctor_info['name']}")
-               
-            except Exception as visit_error:
-                print(f"Error processing doctor {i+1}: {visit_error}")
- 
-        print(f"\nSuccessfully scraped {len(doctors)} doctors")
-       
-        # Export results to CSV
-        export_to_csv(doctors, specialty, location)
-       
-        return doctors
+    print("\n=== Worker throughput ===")
+    for worker_id, pages, failures, elapsed in sorted(stats):
+        rate = pages / elapsed * 60 if elapsed else 0
+        print(f"worker {worker_id}: {pages} profiles, {failures} failures, "
+              f"{elapsed:.1f} s ({rate:.1f} profiles/min)")
+    return results
  
-    except Exception as e:
-        print("Error occurred during the scraping process:")
-        print(e)
-        return []
+def extract_profile_info(driver, fields=None):
+    """Extract the profile fields of the page currently loaded in the driver (only `fields` if given)"""
+    fields = fields or PROFILE_FIELD_SELECTORS
+    doctor_info = {field: "Unknown" for field in fields}
  
-    finally:
+    for field in fields:
+        # The selector that worked last time is tried first
+        group = f"profil.{field}"
+        matched = None
+        for selector in selector_registry.order(group, PROFILE_FIELD_SELECTORS[field]):
+            try:
+                text = driver.find_element(By.CSS_SELECTOR, selector).text.strip()
+                if text:
+                    doctor_info[field] = text
+                    matched = selector
+                    break
+            except:
+                continue
+        selector_registry.record(group, matched)
+ 
+    if doctor_info.get("address") == "Unknown":
+        # Try to find any element containing address information by broader search
         try:
-            driver.quit()
-            print("Browser closed")
-        except:
-            print("Error closing browser")
+            for elem in driver.find_elements(By.XPATH, PROFILE_ADDRESS_FALLBACK_XPATH):
+                text = elem.text.strip()
+                if text and any(s in text.lower() for s in PROFILE_ADDRESS_KEYWORDS):
+                    doctor_info["address"] = text
+                    break
+        except Exception as address_error:
+            print(f"Error extracting address: {address_error}")
+        selector_registry.record("profil.adresse_repli", PROFILE_ADDRESS_FALLBACK_XPATH
+                                 if doctor_info["address"] != "Unknown" else None)
+ 
+    for field, value in doctor_info.items():
+        if value == "Unknown":
+            print(f"Could not extract {field}")
  
-def export_to_csv(doctors, specialty, location):
+    return doctor_info
+ 
+@instrumented("export")
+def export_to_csv(doctors, specialty, location, output_format="csv", depth="profils"):
+    """Export the doctors (dicts or DoctorRecord) to data/<specialty>_<location>_<timestamp> (csv, parquet or sqlite)"""
  
     # Create data directory if it doesn't exist
     data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
     os.makedirs(data_dir, exist_ok=True)
    
-    # Create DataFrame from doctors list
-    df = pd.DataFrame(doctors)
-   
     # Generate filename based on search parameters and timestamp
     timestamp = time.strftime("%Y%m%d_%H%M%S")
-    filename = f"{specialty}_{location}_{timestamp}.csv"
+    filename = f"{specialty}_{location}_{timestamp}{OUTPUT_EXTENSIONS[output_format]}"
     filepath = os.path.join(data_dir, filename)
    
-    # Export to CSV
-    df.to_csv(filepath, index=False, encoding='utf-8-sig')
+    # Export without duplicated doctors (BOM so that Excel detects UTF-8 in CSV files)
+    options = {"encoding": "utf-8-sig"} if output_format == "csv" else {}
+    fieldnames = CSV_FIELDNAMES if depth == "cartes" else PROFILE_FIELDNAMES
+    with open_sink(filepath, fieldnames, output_format, **options) as sink:
+        sink.write_many(DedupIndex().unique(doctors))
    
     print(f"Results exported to: {filepath}")
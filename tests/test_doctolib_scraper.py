@@ -0,0 +1,8 @@
+from doctolib_scraper import result_page_url
+
+def test_result_page_url_sets_the_page_parameter():
+    search_url = "https://www.doctolib.fr/search?location=lyon&speciality=pediatre"
+
+    assert result_page_url(search_url, 3) == search_url + "&page=3"
+    assert result_page_url(search_url + "&page=3", 4) == search_url + "&page=4"
+    assert result_page_url(search_url + "&page=3", 1) == search_url
@@ -0,0 +1,26 @@
+import json
+from doctolib_selectors import SelectorRegistry
+
+def test_new_winner_overtakes_a_long_history():
+    registry = SelectorRegistry()
+    defaults = ["ancien", "nouveau"]
+    registry.order("carte.name", defaults)
+    for _ in range(10000):
+        registry.record("carte.name", "ancien")
+
+    for _ in range(20):
+        registry.record("carte.name", "nouveau")
+
+    assert registry.order("carte.name", defaults)[0] == "nouveau"
+
+def test_lifetime_counts_are_capped_on_load(tmp_path):
+    path = tmp_path / "selectors.json"
+    path.write_text(json.dumps({"groups": {"carte.name": {"hits": {"ancien": 10000}, "misses": 0}}}))
+    registry = SelectorRegistry().load(str(path))
+    defaults = ["ancien", "nouveau"]
+    registry.order("carte.name", defaults)
+
+    for _ in range(20):
+        registry.record("carte.name", "nouveau")
+
+    assert registry.order("carte.name", defaults)[0] == "nouveau"
@@ -0,0 +1,75 @@
+import pytest
+from fixture_server import serve_fixtures, list_fixture_urls
+from http_engine import fetch_profile, fetch_profiles
+from profile_cache import ProfileCache
+from rate_limiter import rate_limiter
+
+@pytest.fixture(scope="module")
+def profile_urls():
+    """URLs des profils enregistrés, par nom de fichier, servis sans limiteur de débit"""
+    enabled = rate_limiter.enabled
+    rate_limiter.configure(enabled=False)
+    try:
+        with serve_fixtures() as base_url:
+            urls = list_fixture_urls(base_url, "profiles")
+            yield {url.rsplit("/", 1)[-1]: url for url in urls}
+    finally:
+        rate_limiter.configure(enabled=enabled)
+
+def test_fetch_profile_extracts_every_field(profile_urls):
+    doctor_info = fetch_profile(profile_urls["dr-bernard-villeurbanne"])
+
+    assert doctor_info == {
+        "name": "Dr Paul Bernard",
+        "specialty": "Pédiatre",
+        "address": "45 Avenue Henri Barbusse\n69100 Villeurbanne",
+        "availability": "Demain 09:30",
+        "tarif": "Consultation : 50 € à 70 €",
+        "convention": "Conventionné secteur 2 avec OPTAM",
+    }
+
+def test_fetch_profile_with_fields_extracts_only_those(profile_urls):
+    doctor_info = fetch_profile(profile_urls["dr-martin-lyon"], fields=("name", "availability"))
+
+    assert doctor_info["name"] == "Dr Claire Martin"
+    assert doctor_info["availability"] == "Prochain RDV le lundi 12 mai"
+    assert doctor_info.get("address", "Unknown") == "Unknown"
+
+def test_page_needing_javascript_returns_none(profile_urls):
+    assert fetch_profile(profile_urls["dr-petit-lyon-js"]) is None
+
+def test_fetch_profiles_keeps_input_order(profile_urls):
+    urls = [profile_urls["dr-petit-lyon-js"], profile_urls["dr-martin-lyon"], profile_urls["dr-bernard-villeurbanne"]]
+    seen = []
+
+    results = fetch_profiles(urls, concurrency=3, on_result=lambda index, info: seen.append(index))
+
+    assert results[0] is None
+    assert [result["name"] for result in results[1:]] == ["Dr Claire Martin", "Dr Paul Bernard"]
+    assert sorted(seen) == [1, 2]
+
+def test_only_complete_profiles_are_cached(profile_urls, tmp_path):
+    cache = ProfileCache(str(tmp_path / "cache.sqlite"))
+    try:
+        fetch_profile(profile_urls["dr-martin-lyon"], cache=cache)
+        fetch_profile(profile_urls["dr-petit-lyon-js"], cache=cache)
+
+        assert cache.get(profile_urls["dr-martin-lyon"])["name"] == "Dr Claire Martin"
+        assert cache.get(profile_urls["dr-petit-lyon-js"]) is None
+    finally:
+        cache.close()
+
+def test_only_stale_fields_are_fetched_again(profile_urls, tmp_path):
+    url = profile_urls["dr-martin-lyon"]
+    cache = ProfileCache(str(tmp_path / "cache.sqlite"), field_ttls={"availability": -1})
+    try:
+        cache.put(url, {"name": "Dr Claire Martin", "address": "Adresse en cache", "availability": "Ancienne"})
+
+        doctor_info = fetch_profile(url, cache=cache)
+
+        assert doctor_info["address"] == "Adresse en cache"
+        assert doctor_info["availability"] == "Prochain RDV le lundi 12 mai"
+        assert cache.lookup(url)[0]["availability"] == "Prochain RDV le lundi 12 mai"
+        assert cache.stale == 2 and cache.hits == 0
+    finally:
+        cache.close()
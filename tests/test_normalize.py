@@ -0,0 +1,31 @@
+from datetime import datetime
+import pytest
+from normalize import parse_availability, parse_price_range
+
+@pytest.mark.parametrize("text, expected", [
+    ("Consultation : 30 €", (30.0, 30.0)),
+    ("25 € à 50 €", (25.0, 50.0)),
+    ("25 à 50 €", (25.0, 50.0)),
+    ("25 a 50 euros", (25.0, 50.0)),
+    ("50 € - 70 €", (50.0, 70.0)),
+    ("50–70 €", (50.0, 70.0)),
+    ("Entre 25,50 et 40 €", (25.5, 40.0)),
+    ("Entre 25 € et 40 €", (25.0, 40.0)),
+    ("Non spécifié", (None, None)),
+])
+def test_parse_price_range(text, expected):
+    assert parse_price_range(text) == expected
+
+def test_range_separator_is_a_whole_word():
+    # "a" collé à un autre mot ne sépare pas deux montants
+    assert parse_price_range("Ref 25a40 €") == (40.0, 40.0)
+
+@pytest.mark.parametrize("text, expected", [
+    ("Demain 09:30", datetime(2025, 5, 13, 9, 30)),
+    ("Prochain RDV le lundi 12 mai à 9h30", datetime(2025, 5, 12, 9, 30)),
+    ("Aujourd'hui 16h", datetime(2025, 5, 12, 16, 0)),
+    ("Disponible le 03/04/2026 à 14:15", datetime(2026, 4, 3, 14, 15)),
+    ("Prochain RDV le lundi 12 mai", datetime(2025, 5, 12)),
+])
+def test_parse_availability_keeps_the_time(text, expected):
+    assert parse_availability(text, datetime(2025, 5, 12, 8, 0)) == expected
@@ -0,0 +1,72 @@
+import csv
+from output_sinks import StreamingCsvWriter, _truncate_partial_line
+
+FIELDNAMES = ["name", "address", "url"]
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def _write(path, rows):
+    with StreamingCsvWriter(str(path), FIELDNAMES) as writer:
+        writer.write_many(rows)
+
+def test_append_after_row_torn_inside_multiline_field(tmp_path):
+    path = tmp_path / "profils.csv"
+    _write(path, [{"name": "Dr A", "address": "1 av Y\n69001 Lyon", "url": "https://a"}])
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        f.write('Dr B,"2 rue Z\n')  # arrêt brutal au milieu de l'adresse
+
+    with StreamingCsvWriter(str(path), FIELDNAMES, append=True) as writer:
+        writer.write({"name": "Dr C", "address": "3 bd W\n69003 Lyon", "url": "https://c"})
+
+    rows = _read(path)
+    assert [row["name"] for row in rows] == ["Dr A", "Dr C"]
+    assert rows[1]["address"] == "3 bd W\n69003 Lyon"
+
+def test_complete_rows_with_quotes_are_kept(tmp_path):
+    path = tmp_path / "profils.csv"
+    rows = [{"name": 'Dr "Bob"', "address": "1 av Y\n69001 Lyon", "url": "https://a"},
+            {"name": "Dr B", "address": "2 rue Z", "url": "https://b"}]
+    _write(path, rows)
+    size = path.stat().st_size
+
+    _truncate_partial_line(str(path), chunk_size=7)
+
+    assert path.stat().st_size == size
+    assert _read(path) == rows
+
+def test_torn_single_line_row_is_removed(tmp_path):
+    path = tmp_path / "cartes.csv"
+    _write(path, [{"name": "Dr A", "address": "1 av Y", "url": "https://a"}])
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        f.write("Dr B,2 ru")
+
+    _truncate_partial_line(str(path))
+
+    assert [row["name"] for row in _read(path)] == ["Dr A"]
+
+def test_resumed_sqlite_output_replays_checkpointed_rows(tmp_path):
+    import sqlite3
+    from checkpoint import CARD, CheckpointStore
+    from doctolib_scraper import CSV_FIELDNAMES
+    from output_sinks import SqliteWriter, open_resumable_sink
+
+    rows = [{"Nom complet": f"Dr {name}", "Ville": "Lyon"} for name in ("A", "B", "C")]
+    path = str(tmp_path / "cartes.sqlite")
+    checkpoint = CheckpointStore(str(tmp_path / "cartes.checkpoint.sqlite"), resume=False)
+    # Exécution interrompue: un lot écrit, le suivant encore en mémoire, tous marqués
+    writer = SqliteWriter(path, CSV_FIELDNAMES, batch_size=2)
+    for row in rows:
+        writer.write(row)
+        checkpoint.mark_done(CARD, row["Nom complet"], row)
+    writer._conn.close()
+
+    with open_resumable_sink(path, CSV_FIELDNAMES, checkpoint, CARD, resume=True) as sink:
+        sink.write({"Nom complet": "Dr D", "Ville": "Lyon"})
+    checkpoint.close()
+
+    conn = sqlite3.connect(path)
+    names = [name for (name,) in conn.execute('SELECT "Nom complet" FROM medecins')]
+    conn.close()
+    assert names == ["Dr A", "Dr B", "Dr C", "Dr D"]
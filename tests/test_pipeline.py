@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+import pipeline
+from fixture_server import serve_fixtures, list_fixture_urls
+from rate_limiter import rate_limiter
+from scraper_core import DoctorRecord
+
+class FailingSink:
+    def write(self, record):
+        raise OSError("disque plein")
+
+def test_writer_failure_is_raised_instead_of_hanging(monkeypatch):
+    enabled = rate_limiter.enabled
+    rate_limiter.configure(enabled=False)
+    try:
+        with serve_fixtures() as base_url:
+            url = list_fixture_urls(base_url, "profiles")[0]
+            produced = []
+
+            # Bien plus de cartes que les files n'en contiennent: sans arrêt, le producteur resterait bloqué
+            def stream_cards(session, specialty, location, on_card, *args):
+                for i in range(50):
+                    on_card(DoctorRecord.from_card({"Nom complet": f"Dr {i}", "url": f"{url}?n={i}"}))
+                    produced.append(i)
+                return True
+
+            monkeypatch.setattr(pipeline, "stream_cards", stream_cards)
+            with pytest.raises(OSError, match="disque plein"):
+                asyncio.run(asyncio.wait_for(
+                    pipeline._run_pipeline(None, "pediatre", "lyon", FailingSink(), {"http_concurrency": 2}, []),
+                    timeout=30))
+            assert len(produced) < 50
+    finally:
+        rate_limiter.configure(enabled=enabled)
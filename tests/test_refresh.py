@@ -0,0 +1,14 @@
+from datetime import datetime
+from refresh import availability_changed
+
+def test_a_new_time_on_the_same_day_is_a_change():
+    today = datetime(2025, 5, 12, 8, 0)
+
+    assert availability_changed("Demain 09:30", "Demain 16:00", today, today)
+    assert not availability_changed("Demain 09:30", "Demain 9h30", today, today)
+
+def test_normalized_value_is_compared_with_its_time():
+    today = datetime(2025, 5, 12, 8, 0)
+
+    assert not availability_changed(datetime(2025, 5, 13, 9, 30), "Demain 09:30", today, today)
+    assert availability_changed("2025-05-13 09:30", "Demain 16h", today, today)
@@ -0,0 +1,124 @@
+import time
+import threading
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+# Délais maximum (en secondes) par étape, modifiables via configure_timeouts()
+WAIT_TIMEOUTS = {
+    "page": 15,            # document.readyState == "complete"
+    "cookies": 5,          # bannière de cookies
+    "barre_recherche": 10, # champs de la barre de recherche
+    "suggestions": 5,      # liste de suggestions (spécialité / lieu)
+    "resultats": 15,       # apparition de la page de résultats
+    "defilement": 3,       # élément visible après scrollIntoView
+    "stabilite_dom": 5,    # plus aucune mutation du DOM
+    "profil": 10,          # en-tête d'une page de profil
+}
+
+# Durée (en ms) sans mutation du DOM pour considérer la page comme stable
+DOM_QUIET_MS = 300
+
+# Temps cumulé passé à attendre, par étape: {étape: [total_secondes, nb_attentes, nb_timeouts]}
+wait_stats = {}
+_stats_lock = threading.Lock()
+
+# Délai jusqu'à la première carte de résultat, par mode de navigation: {mode: [secondes, ...]}
+first_result_times = {}
+
+_MUTATION_OBSERVER_JS = """
+if (!window.__dlMutationObserver) {
+    window.__dlLastMutation = performance.now();
+    window.__dlMutationObserver = new MutationObserver(function() {
+        window.__dlLastMutation = performance.now();
+    });
+    window.__dlMutationObserver.observe(document, {childList: true, subtree: true, attributes: true});
+}
+return performance.now() - window.__dlLastMutation;
+"""
+
+def configure_timeouts(**timeouts):
+    """Met à jour les délais d'attente par étape (ex: configure_timeouts(resultats=20))"""
+    for step, value in timeouts.items():
+        if step not in WAIT_TIMEOUTS:
+            raise ValueError(f"Étape d'attente inconnue: {step}")
+        WAIT_TIMEOUTS[step] = float(value)
+
+def parse_timeouts(spec):
+    """Convertit 'resultats=20,suggestions=3' en dictionnaire de délais"""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        step, _, value = item.partition("=")
+        timeouts[step.strip()] = float(value)
+    return timeouts
+
+def _record(step, elapsed, timed_out):
+    with _stats_lock:
+        stats = wait_stats.setdefault(step, [0.0, 0, 0])
+        stats[0] += elapsed
+        stats[1] += 1
+        if timed_out:
+            stats[2] += 1
+
+def wait_until(driver, condition, step, timeout=None, poll_frequency=0.1):
+    """Attend qu'une condition soit vraie et comptabilise le temps d'attente de l'étape.
+
+    Retourne la valeur de la condition, ou None si le délai est dépassé.
+    """
+    timeout = WAIT_TIMEOUTS[step] if timeout is None else timeout
+    start = time.perf_counter()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(condition)
+        _record(step, time.perf_counter() - start, False)
+        return result
+    except TimeoutException:
+        _record(step, time.perf_counter() - start, True)
+        return None
+
+def wait_for_presence(driver, locator, step, timeout=None):
+    """Attend la présence d'un élément"""
+    return wait_until(driver, EC.presence_of_element_located(locator), step, timeout)
+
+def wait_for_clickable(driver, locator, step, timeout=None):
+    """Attend qu'un élément soit cliquable"""
+    return wait_until(driver, EC.element_to_be_clickable(locator), step, timeout)
+
+def wait_for_visible(driver, element, step="defilement", timeout=None):
+    """Attend qu'un élément déjà trouvé soit visible"""
+    return wait_until(driver, EC.visibility_of(element), step, timeout)
+
+def wait_for_page_ready(driver, step="page", timeout=None):
+    """Attend la fin du chargement du document"""
+    return wait_until(
+        driver,
+        lambda d: d.execute_script("return document.readyState") == "complete",
+        step, timeout)
+
+def wait_for_dom_quiescence(driver, step="stabilite_dom", quiet_ms=DOM_QUIET_MS, timeout=None):
+    """Attend qu'aucune mutation du DOM n'ait eu lieu pendant quiet_ms millisecondes"""
+    return wait_until(
+        driver,
+        lambda d: d.execute_script(_MUTATION_OBSERVER_JS) >= quiet_ms,
+        step, timeout)
+
+def record_first_result(method, elapsed):
+    """Enregistre le délai jusqu'à la première carte de résultat pour un mode de navigation"""
+    with _stats_lock:
+        first_result_times.setdefault(method, []).append(elapsed)
+
+def reset_wait_stats():
+    """Remet à zéro les statistiques d'attente"""
+    wait_stats.clear()
+    first_result_times.clear()
+
+def print_wait_report():
+    """Affiche le temps passé à attendre pour chaque étape"""
+    if not wait_stats:
+        return
+    total = sum(stats[0] for stats in wait_stats.values())
+    print("\n=== Temps d'attente par étape ===")
+    for step, (elapsed, count, timeouts) in sorted(wait_stats.items(), key=lambda item: -item[1][0]):
+        print(f"{step:<16} {elapsed:7.2f} s  ({count} attentes, {timeouts} délais dépassés)")
+    print(f"{'total':<16} {total:7.2f} s")
+    for method, times in sorted(first_result_times.items()):
+        print(f"Premier résultat ({method}): {sum(times) / len(times):.2f} s en moyenne sur {len(times)} recherche(s)")